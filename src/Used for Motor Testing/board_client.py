@@ -0,0 +1,210 @@
+"""! @file board_client.py
+Host side of the command protocol in command_server.py. Opens the board's
+serial port once and then sets the gain, period and setpoint and runs tests
+as often as needed, with no reboot between runs.
+
+    with BoardClient.open('COM7') as board:
+        board.configure(kp=0.05, period_ms=30, setpoint=100000)
+        times, positions = board.run()
+
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import time
+from telemetry import read_text, read_binary, read_frames
+
+## Range of MicroPython's ticks_us() clock, which wraps around
+TICKS_PERIOD = 1 << 30
+
+
+def ticks_diff(end, start):
+    """!
+    Returns end - start for two board ticks_us() times, as time.ticks_diff()
+    does on the board
+    """
+    return ((end - start + TICKS_PERIOD//2) & (TICKS_PERIOD - 1)) - TICKS_PERIOD//2
+
+
+class BoardClient:
+    """!
+    This class sends commands to a board running CommandServer
+    """
+
+    def __init__(self, ser, timeout=5.0):
+        """!
+        @param ser Open serial port, such as serial.Serial('COM7')
+        @param timeout Seconds to wait for the answer to a command
+        """
+        self.ser = ser
+        self.timeout = timeout
+        self.binary = False
+        ## Length of a run in ms, as set on the board by configure()
+        self.duration_ms = 5000
+        ## Board ticks_us() time the latest run's sample times count from
+        self.start_us = None
+        ## Host time.monotonic() and board ticks_us() at one instant, as
+        ## measured by sync()
+        self.clock = None
+
+    @classmethod
+    def open(cls, port, reset=False, **options):
+        """!
+        Opens a serial port and connects to the board
+        @param port Serial port name, such as 'COM7'
+        @param reset True to restart main.py on the board first, needed if
+               the board is at the REPL prompt rather than serving commands
+        @param options Other arguments of BoardClient()
+        """
+        import serial
+        client = cls(serial.Serial(port, timeout=0.1), **options)
+        if reset:
+            client.reset()
+        return client
+
+    def close(self):
+        self.ser.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def reset(self):
+        """!
+        Soft reboots the board and waits until the command server is ready.
+        Only needed once, not between runs.
+        """
+        self.ser.write(b'\x03')
+        self.ser.write(b'\x04')
+        self._answer(lambda line: line == 'ready')
+
+    def _answer(self, done):
+        # reads lines until one passes done(); other lines, such as driver
+        # banners, are skipped
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            line = self.ser.readline().decode('utf-8', 'replace').strip()
+            if done(line):
+                return line
+        raise TimeoutError('No answer from the board')
+
+    def command(self, text):
+        """!
+        Sends one command and waits for its answer
+        @param text Command, such as 'kp 0.05'
+        @returns The answer without its leading "ok"
+        """
+        # drop anything left over, such as the answer to an idle stop
+        self.ser.reset_input_buffer()
+        self.ser.write(text.encode() + b'\r\n')
+        line = self._answer(lambda line: line.startswith(('ok', 'err')))
+        if line.startswith('err'):
+            raise ValueError(f"Board rejected '{text}': {line[4:]}")
+        return line[3:]
+
+    def configure(self, kp=None, period_ms=None, setpoint=None, duration_ms=None,
+                  binary=None):
+        """!
+        Changes the test settings; the ones left as None stay as they are
+        @param kp Proportional gain
+        @param period_ms Control period in ms
+        @param setpoint Setpoint in encoder ticks
+        @param duration_ms Length of a run in ms
+        @param binary True for binary frames, False for text lines
+        """
+        if kp is not None:
+            self.command(f"kp {kp}")
+        if period_ms is not None:
+            self.command(f"period {int(period_ms)}")
+        if setpoint is not None:
+            self.command(f"setpoint {int(setpoint)}")
+        if duration_ms is not None:
+            self.command(f"duration {int(duration_ms)}")
+            self.duration_ms = int(duration_ms)
+        if binary is not None:
+            self.command('format bin' if binary else 'format text')
+            self.binary = binary
+
+    def settings(self):
+        """!
+        Asks the board for its settings
+        @returns Dict of setting names and values as text
+        """
+        return dict(word.split('=', 1) for word in self.command('get').split())
+
+    def sync(self, tries=5):
+        """!
+        Measures the board's clock against the host's. Of a few exchanges,
+        the one with the shortest round trip is kept, and the board is taken
+        to have read its clock halfway through it.
+        @param tries Number of exchanges
+        """
+        best = None
+        for n in range(tries):
+            sent = time.monotonic()
+            ticks = int(self.command('ticks').split()[1])
+            back = time.monotonic()
+            if best is None or back - sent < best[0]:
+                best = (back - sent, (sent + back)/2, ticks)
+        self.clock = best[1:]
+
+    def host_time(self, ticks_us):
+        """!
+        Converts a board ticks_us() time to host time, using the last sync()
+        @param ticks_us Board time, such as start_us
+        @returns Host time.monotonic() in seconds
+        """
+        host, ticks = self.clock
+        return host + ticks_diff(ticks_us, ticks)/1e6
+
+    def start(self, name='run'):
+        """!
+        Starts a run without reading its results, for callers that read them
+        as they arrive, such as live_plot.py; run() and record() do both
+        @param name Command starting the run, 'run' or 'record'
+        @returns Seconds to wait for the results
+        """
+        # the answer holds the start time, which older firmware leaves out
+        words = self.command(name).split()
+        self.start_us = int(words[1]) if len(words) > 1 else None
+        # the board sends nothing until its run is over, so wait for the run
+        # and then the usual answer timeout
+        return self.duration_ms/1000 + self.timeout
+
+    def run(self):
+        """!
+        Runs one test and reads its results
+        @returns Lists of times and positions; the times are in ms from the
+                 board time start_us
+        """
+        wait = self.start('run')
+        if self.binary:
+            return read_binary(self.ser, wait)
+        return read_text(self.ser, wait)
+
+    def run_records(self):
+        """!
+        Runs one test and reads every field the board logged, as plant_fit.py
+        needs. Switches the board to binary frames.
+        @returns Array of (time, setpoint, position, duty) rows
+        """
+        if not self.binary:
+            self.configure(binary=True)
+        return read_frames(self.ser, self.start('run')).records()
+
+    def record(self):
+        """!
+        Runs one test and reads every encoder read the board made
+        @returns Array of (counter, ticks_us) rows, see encoder_recorder.py
+        """
+        return read_frames(self.ser, self.start('record')).records()
+
+    def stop(self):
+        """!
+        Stops the motor. Sent during a run, it ends the run early; the run's
+        results still arrive and are read by run().
+        """
+        self.ser.write(b'stop\r\n')
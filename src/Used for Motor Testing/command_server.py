@@ -0,0 +1,212 @@
+"""! @file command_server.py
+Runs step response tests on command over the USB serial port, so the host
+can change the gain, period and setpoint and start runs back to back
+without rebooting the board. Commands are text lines:
+    kp 0.05           proportional gain
+    period 30         control period in ms
+    setpoint 100000   setpoint in encoder ticks
+    duration 5000     length of a run in ms
+    format bin        send results as binary frames (or text)
+    get               report the settings
+    ticks             report the board's ticks_us clock
+    run               run a test and send the results
+    record            run a test and send the raw encoder reads instead
+    stop              stop a run early, or the motor when idle
+Each command is answered by a line starting with "ok" or "err"; during a
+run, every command but stop is answered with "err busy". The answer
+to run and record holds the ticks_us time the run's sample times count
+from, so the host can line up runs on several boards. A run sends its
+results after the "ok" line, as "time, position" lines ending with End, or
+as telemetry frames ending with an end frame. A recording is always sent
+as frames of (counter, ticks_us) records, see encoder_recorder.py. A line holding only a
+period, such as "50" or "50 bin", runs a test at that period, as the old
+input() prompt did.
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import time
+from telemetry import TelemetryWriter
+from sample_logger import FIELDS
+import encoder_recorder
+
+
+class CommandServer:
+    """!
+    This class reads commands from a serial port and runs tests on a servo
+    """
+
+    def __init__(self, servo, log, port, recorder=None):
+        """!
+        @param servo Servo to test
+        @param log SampleLogger that holds the samples of a run
+        @param port Serial port to read commands from, such as pyb.USB_VCP()
+        @param recorder EncoderRecorder of the servo's encoder, needed for
+               the record command
+        """
+        self.servo = servo
+        self.log = log
+        self.port = port
+        self.recorder = recorder
+        self.kp = 0.05
+        self.period_ms = 50
+        self.setpoint = 100000
+        self.duration_ms = 5000
+        self.binary = False
+        self.line = bytearray()
+
+    def poll(self):
+        """!
+        Reads whatever has arrived on the port without waiting
+        @returns The next complete command line, or None if there is none yet
+        """
+        while self.port.any():
+            byte = self.port.read(1)
+            if byte in (b'\r', b'\n'):
+                if self.line:
+                    text = self.line.decode().strip()
+                    self.line = bytearray()
+                    return text
+            else:
+                self.line.extend(byte)
+        return None
+
+    def reply(self, text):
+        """!
+        Sends one answer line to the host
+        """
+        print(text)
+
+    def settings(self):
+        """!
+        Returns the current settings as "name=value" words
+        """
+        return (f"kp={self.kp} period={self.period_ms} setpoint={self.setpoint} "
+                f"duration={self.duration_ms} format={'bin' if self.binary else 'text'}")
+
+    def handle(self, line):
+        """!
+        Carries out one command line
+        @param line Command text without the line ending
+        """
+        words = line.split()
+        if not words:
+            return
+        name = words[0].lower()
+        try:
+            if name.isdigit():
+                self.period_ms = int(name)
+                self.binary = len(words) > 1 and words[1] == 'bin'
+                self.run()
+            elif name == 'kp':
+                self.kp = float(words[1])
+                self.reply(f"ok kp {self.kp}")
+            elif name == 'period':
+                self.period_ms = max(int(words[1]), 1)
+                self.reply(f"ok period {self.period_ms}")
+            elif name == 'setpoint':
+                self.setpoint = int(words[1])
+                self.reply(f"ok setpoint {self.setpoint}")
+            elif name == 'duration':
+                duration_ms = int(words[1])
+                if duration_ms <= 0:
+                    self.reply("err duration must be positive")
+                else:
+                    self.duration_ms = duration_ms
+                    self.reply(f"ok duration {self.duration_ms}")
+            elif name == 'format':
+                self.binary = words[1] == 'bin'
+                self.reply(f"ok format {words[1]}")
+            elif name == 'get':
+                self.reply("ok " + self.settings())
+            elif name == 'ticks':
+                self.reply(f"ok ticks {time.ticks_us()}")
+            elif name == 'run':
+                start = time.ticks_us()
+                self.reply(f"ok run {start}")
+                self.run(start=start)
+            elif name == 'record':
+                if self.recorder is None:
+                    self.reply("err no recorder")
+                else:
+                    start = time.ticks_us()
+                    self.reply(f"ok record {start}")
+                    self.run(record=True, start=start)
+            elif name == 'stop':
+                self.servo.run(0)
+                self.reply("ok stop")
+            else:
+                self.reply(f"err unknown command {name}")
+        except (IndexError, ValueError):
+            self.reply(f"err bad argument for {name}")
+
+    def run(self, record=False, start=None):
+        """!
+        Runs one step response test with the current settings and sends the
+        samples. A stop command received during the run ends it early; other
+        commands are answered with "err busy".
+        @param record True to send every encoder read of the run instead
+        @param start ticks_us() time the sample times count from; now if None
+        """
+        serv = self.servo
+        log = self.log
+        ms = self.period_ms
+        setpoint = self.setpoint
+        serv.set_Kp(self.kp)
+        serv.encoder.zero()
+        log.clear()
+        if record:
+            self.recorder.start()
+        if start is None:
+            start = time.ticks_us()
+        serv.set_setpoint(setpoint)
+        for n in range(self.duration_ms//ms):
+            duty = int(serv.PWM)
+            time.sleep_ms(ms)
+            # the encoder is read once per period, by the control update, so
+            # a recording holds exactly the reads the controller acted on;
+            # each sample keeps the duty applied over the period it ends
+            t = time.ticks_diff(time.ticks_us(), start)//1000
+            serv.set_setpoint(setpoint)
+            log.record(t, setpoint, serv.encoder.pos, duty)
+            if self.port.any() and self._stopped():
+                break
+        serv.run(0)
+        if record:
+            self.recorder.stop()
+            frames = TelemetryWriter(self.port, fields=encoder_recorder.FIELDS)
+            self.recorder.dump_frames(frames)
+            frames.end()
+        elif self.binary:
+            frames = TelemetryWriter(self.port, fields=FIELDS)
+            log.dump_frames(frames)
+            frames.end()
+        else:
+            log.dump_text()
+            if log.dropped:
+                print(f"Dropped {log.dropped} samples")
+            print('End')
+
+    def _stopped(self):
+        # answers the commands that arrived during a run: stop ends it and
+        # any other is refused, so the host is not left waiting for a reply
+        line = self.poll()
+        while line is not None:
+            if line.lower() == 'stop':
+                return True
+            self.reply("err busy")
+            line = self.poll()
+        return False
+
+    def serve(self):
+        """!
+        Answers commands forever
+        """
+        self.reply("ready")
+        while True:
+            line = self.poll()
+            if line is None:
+                time.sleep_ms(1)
+            else:
+                self.handle(line)
@@ -0,0 +1,76 @@
+"""! @file decimated_line.py
+Level of detail drawing for long traces. The full resolution samples stay
+in NumPy arrays, and the line on screen only holds the smallest and largest
+sample of each pixel column across the visible time range, so redrawing,
+panning and zooming cost about the same for a million samples as for a
+thousand. Zooming in recomputes the visible window at full detail.
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import numpy as np
+
+
+def minmax_indices(y, buckets):
+    """!
+    Picks the samples that keep the shape of a trace when drawn in a given
+    number of columns: the first and last samples and the smallest and
+    largest sample of every column
+    @param y Sample values
+    @param buckets Number of columns, such as the plot width in pixels
+    @returns Sorted array of sample indices
+    """
+    n = len(y)
+    if n <= 2*buckets + 2:
+        return np.arange(n)
+    size = n//buckets
+    full = y[:size*buckets].reshape(buckets, size)
+    starts = np.arange(buckets)*size
+    picks = [starts + np.argmin(full, axis=1), starts + np.argmax(full, axis=1),
+             [0, n - 1]]
+    if size*buckets < n:
+        rest = y[size*buckets:]
+        picks.append([size*buckets + np.argmin(rest), size*buckets + np.argmax(rest)])
+    return np.unique(np.concatenate(picks))
+
+
+class DecimatedLine:
+    """!
+    This class draws a trace on Matplotlib axes at screen resolution and
+    redraws it whenever the horizontal view limits change
+    """
+
+    def __init__(self, axes, x, y, **style):
+        """!
+        Plots a trace
+        @param axes Matplotlib axes to draw on
+        @param x Sample times, in increasing order
+        @param y Sample values
+        @param style Line properties passed on to axes.plot(), such as label
+        """
+        self.axes = axes
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        keep = minmax_indices(self.y, self._columns())
+        self.line, = axes.plot(self.x[keep], self.y[keep], **style)
+        # a plain function is held strongly by the callback registry, which
+        # keeps this object alive as long as the axes are
+        axes.callbacks.connect('xlim_changed', lambda ax: self.update())
+
+    def _columns(self):
+        return max(int(self.axes.bbox.width), 100)
+
+    def update(self):
+        """!
+        Redraws the part of the trace inside the current view limits
+        """
+        if self.line.axes is None:
+            return
+        low, high = self.axes.get_xlim()
+        # one sample beyond each edge so the line runs to the border
+        first = max(np.searchsorted(self.x, low) - 1, 0)
+        last = min(np.searchsorted(self.x, high, side='right') + 1, len(self.x))
+        keep = first + minmax_indices(self.y[first:last], self._columns())
+        self.line.set_data(self.x[keep], self.y[keep])
+        self.axes.figure.canvas.draw_idle()
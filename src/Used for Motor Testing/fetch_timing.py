@@ -0,0 +1,112 @@
+"""! @file fetch_timing.py
+Stops the scheduler running on the board with Ctrl-C, reads the timing
+results that main.py prints from loop_timing.show_all() and summarises them:
+call counts, mean and worst times, and percentiles estimated from the
+histograms.
+
+    python fetch_timing.py COM7
+
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import re
+import sys
+import time
+
+STATS_LINE = re.compile(r'^(\S+): n=(\d+) mean=(\d+)us worst=(\d+)us '
+                        r'\| (\d+)us buckets ([\d,]+)')
+COUNTER_LINE = re.compile(r'^(\S+)\.(late_starts|deadline_misses): (\d+)')
+
+## Description of each counter in the summary
+COUNTERS = dict(late_starts='runs started a period or more late',
+                deadline_misses='runs finished after their deadline')
+
+
+def parse_timing(text):
+    """!
+    Finds the timing results in text printed by the board
+    @param text Printout containing the lines of loop_timing.show_all()
+    @returns Tuple of a dict of stats by name, each a dict with count,
+             mean_us, worst_us, bucket_us and hist, and a dict of counters
+             by loop or task name, each a dict with late_starts and, for
+             scheduler tasks, deadline_misses
+    """
+    stats = {}
+    counters = {}
+    for line in text.splitlines():
+        line = line.strip()
+        found = STATS_LINE.match(line)
+        if found:
+            name, count, mean, worst, bucket, hist = found.groups()
+            stats[name] = dict(count=int(count), mean_us=int(mean),
+                               worst_us=int(worst), bucket_us=int(bucket),
+                               hist=[int(n) for n in hist.split(',')])
+            continue
+        found = COUNTER_LINE.match(line)
+        if found:
+            name, counter, value = found.groups()
+            counters.setdefault(name, {})[counter] = int(value)
+    return stats, counters
+
+
+def percentile(entry, fraction):
+    """!
+    Estimates a percentile from a histogram as the upper edge of the bucket
+    it falls in, never above the worst case
+    @param entry One stats dict from parse_timing()
+    @param fraction Fraction of samples at or below the result, such as 0.99
+    """
+    hist = entry['hist']
+    wanted = fraction*sum(hist)
+    seen = 0
+    for n, count in enumerate(hist):
+        seen += count
+        if seen >= wanted:
+            if n == len(hist) - 1:
+                return entry['worst_us']
+            return min((n + 1)*entry['bucket_us'], entry['worst_us'])
+    return entry['worst_us']
+
+
+def summarise(stats, counters):
+    """!
+    Formats parsed timing results as a table
+    """
+    lines = [f"{'name':<24}{'n':>8}{'mean us':>10}{'p50 us':>10}"
+             f"{'p99 us':>10}{'worst us':>10}"]
+    for name, entry in stats.items():
+        lines.append(f"{name:<24}{entry['count']:>8}{entry['mean_us']:>10}"
+                     f"{percentile(entry, 0.5):>10}{percentile(entry, 0.99):>10}"
+                     f"{entry['worst_us']:>10}")
+    for name, counts in counters.items():
+        for counter, value in counts.items():
+            lines.append(f"{name}: {value} {COUNTERS[counter]}")
+    return '\n'.join(lines)
+
+
+def fetch(port, timeout=5.0):
+    """!
+    Interrupts the board and collects what it prints until the REPL prompt
+    @param port Serial port name, such as 'COM7'
+    @param timeout Seconds to wait for the prompt
+    @returns The text received
+    """
+    import serial
+
+    text = b''
+    with serial.Serial(port, timeout=0.1) as ser:
+        ser.write(b'\x03')
+        stop = time.monotonic() + timeout
+        while b'>>>' not in text and time.monotonic() < stop:
+            text += ser.read(ser.in_waiting or 1)
+    return text.decode('utf-8', 'replace')
+
+
+if __name__ == "__main__":
+    stats, counters = parse_timing(fetch(sys.argv[1] if len(sys.argv) > 1 else 'COM7'))
+    if stats:
+        print(summarise(stats, counters))
+    else:
+        print("No timing results received")
@@ -0,0 +1,242 @@
+"""! @file live_plot.py
+Streaming version of the response test plot. A background thread reads the
+serial port into a preallocated ring buffer while the Tk window redraws the
+trace a limited number of times per second, moving the existing Line2D
+instead of plotting again and blitting only the axes area. The test is run
+through the board's command server, so the board is not rebooted between
+runs. The window stays responsive during a run and the run can be
+cancelled partway through.
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import threading
+import time
+import numpy as np
+from telemetry import TelemetryReader, TIME, POSITION
+
+
+class RingBuffer:
+    """!
+    This class stores the latest samples in fixed NumPy arrays, overwriting
+    the oldest ones once full, so memory does not grow with run length.
+    It can be written by one thread while another reads it.
+    """
+
+    def __init__(self, capacity, columns=2):
+        """!
+        Creates an empty buffer
+        @param capacity Number of samples kept
+        @param columns Values per sample, such as time and position
+        """
+        self.data = np.zeros((capacity, columns))
+        self.capacity = capacity
+        self.head = 0
+        self.size = 0
+        ## Samples added since the buffer was cleared
+        self.written = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    def clear(self):
+        with self.lock:
+            self.head = 0
+            self.size = 0
+            self.written = 0
+
+    def extend(self, rows):
+        """!
+        Adds samples
+        @param rows Array-like of shape (samples, columns)
+        """
+        rows = np.asarray(rows, dtype=float)[-self.capacity:]
+        n = len(rows)
+        with self.lock:
+            end = self.head + n
+            if end <= self.capacity:
+                self.data[self.head:end] = rows
+            else:
+                split = self.capacity - self.head
+                self.data[self.head:] = rows[:split]
+                self.data[:n - split] = rows[split:]
+            self.head = end % self.capacity
+            self.size = min(self.size + n, self.capacity)
+            self.written += n
+
+    def snapshot(self):
+        """!
+        Returns a copy of the stored samples, oldest first
+        """
+        with self.lock:
+            if self.size < self.capacity:
+                return self.data[:self.size].copy()
+            return np.roll(self.data, -self.head, axis=0)
+
+
+class SerialStreamReader(threading.Thread):
+    """!
+    This thread starts a response test on the board through its command
+    server and moves every sample it sends into a ring buffer until the
+    board says the run is over
+    """
+
+    def __init__(self, board, buffer):
+        """!
+        Creates the reader; call start() to begin
+        @param board BoardClient of a board with its test settings made
+        @param buffer RingBuffer receiving (time, position) samples
+        """
+        super().__init__(daemon=True)
+        self.board = board
+        self.buffer = buffer
+        self.deadline = None
+        self.error = None
+
+    def cancel(self):
+        """!
+        Ends the run early with the stop command; the samples so far still
+        arrive
+        """
+        if self.is_alive():
+            self.board.stop()
+
+    def run(self):
+        try:
+            self.deadline = time.monotonic() + self.board.start('run')
+            if self.board.binary:
+                self._read_binary(self.board.ser)
+            else:
+                self._read_text(self.board.ser)
+        except Exception as err:
+            self.error = err
+
+    def _check_deadline(self):
+        # gives up once the results are overdue, so a silent board cannot
+        # keep the thread alive
+        if time.monotonic() > self.deadline:
+            raise TimeoutError(f"No end of the run after {self.buffer.written} samples")
+
+    def _read_binary(self, ser):
+        reader = TelemetryReader()
+        while True:
+            self._check_deadline()
+            ended = reader.feed(ser.read(ser.in_waiting or 1))
+            records = reader.new_records()
+            if len(records):
+                self.buffer.extend(records[:, (TIME, POSITION)])
+            if ended:
+                break
+
+    def _read_text(self, ser):
+        pending = b''
+        while True:
+            self._check_deadline()
+            pending += ser.read(ser.in_waiting or 1)
+            *lines, pending = pending.split(b'\n')
+            rows = []
+            for line in lines:
+                if b'End' in line:
+                    self.buffer.extend(rows)
+                    return
+                squib = line.split(b',')
+                if len(squib) == 2:
+                    try:
+                        rows.append((float(squib[0]), int(squib[1])))
+                    except ValueError:
+                        continue
+            if rows:
+                self.buffer.extend(rows)
+
+
+class LivePlot:
+    """!
+    This class redraws one trace from a ring buffer at a capped frame rate
+    using the Tk event loop, so no drawing happens on the reader thread
+    """
+
+    def __init__(self, axes, canvas, buffer, fps=20):
+        """!
+        Creates the plot updater
+        @param axes Matplotlib axes to draw on
+        @param canvas FigureCanvasTkAgg holding the axes
+        @param buffer RingBuffer with (time, position) samples
+        @param fps Largest number of redraws per second
+        """
+        self.axes = axes
+        self.canvas = canvas
+        self.buffer = buffer
+        self.interval_ms = max(int(1000/fps), 1)
+        self.line = None
+        self.background = None
+        self.reader = None
+        self.drawn = -1
+        ## Connection id of the draw_event callback, while a run is drawn
+        self.cid = None
+
+    def start(self, reader):
+        """!
+        Starts a reader thread and the periodic redraw
+        @param reader SerialStreamReader filling the buffer
+        """
+        self.buffer.clear()
+        self.reader = reader
+        self.line, = self.axes.plot([], [], animated=True)
+        self.drawn = -1
+        if self.cid is None:
+            self.cid = self.canvas.mpl_connect('draw_event', self._grab_background)
+        self.canvas.draw()
+        reader.start()
+        self._tick()
+
+    def cancel(self):
+        """!
+        Stops the run in progress, keeping what has been plotted
+        """
+        if self.reader is not None:
+            self.reader.cancel()
+
+    def _grab_background(self, event):
+        self.background = self.canvas.copy_from_bbox(self.axes.bbox)
+        if self.line is not None:
+            self.axes.draw_artist(self.line)
+
+    def _tick(self):
+        data = self.buffer.snapshot()
+        if len(data) and self.buffer.written != self.drawn:
+            self.drawn = self.buffer.written
+            self.line.set_data(data[:, 0], data[:, 1])
+            if self._rescale(data):
+                self.canvas.draw()
+            else:
+                self.canvas.restore_region(self.background)
+                self.axes.draw_artist(self.line)
+                self.canvas.blit(self.axes.bbox)
+        if self.reader.is_alive():
+            self.canvas.get_tk_widget().after(self.interval_ms, self._tick)
+        else:
+            # leave a normal artist behind so later redraws include it, and
+            # stop grabbing backgrounds, which only blitting needs
+            self.canvas.mpl_disconnect(self.cid)
+            self.cid = None
+            self.line.set_animated(False)
+            self.canvas.draw()
+            if self.reader.error is not None:
+                print(f"Run stopped: {self.reader.error}")
+
+    def _rescale(self, data):
+        # widen the axes with some headroom when the trace leaves them, so a
+        # full redraw is only needed now and then
+        x0, x1 = self.axes.get_xlim()
+        y0, y1 = self.axes.get_ylim()
+        lo = data.min(axis=0)
+        hi = data.max(axis=0)
+        if lo[0] >= x0 and hi[0] <= x1 and lo[1] >= y0 and hi[1] <= y1:
+            return False
+        xspan = max(hi[0] - lo[0], 1.0)
+        yspan = max(hi[1] - lo[1], 1.0)
+        self.axes.set_xlim(lo[0], hi[0] + xspan)
+        self.axes.set_ylim(lo[1] - 0.1*yspan, hi[1] + 0.25*yspan)
+        return True
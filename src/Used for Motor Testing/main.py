@@ -13,6 +13,9 @@ import time
 import cqueue
 from motor_driver_updated import MotorDriver
 from encoder_reader_updated import Encoder
+from sample_logger import SampleLogger
+from command_server import CommandServer
+from encoder_recorder import EncoderRecorder
 
 # Allow interrupts to display errors
 micropython.alloc_emergency_exception_buf(100)
@@ -66,33 +69,8 @@ if __name__ == "__main__":
     enc = Encoder(pyb.Pin.board.PC6, pyb.Pin.board.PC7, 8, 1, 2)
     # set up Servo class object using the MotorDriver and Encoder objects specified
     serv = Servo(moe, enc)
+    # set up sample buffer for up to 1000 data points per run
+    log = SampleLogger(1000)
     
-    # run test ad infinitum
-    while True:
-        # requests ms between control feedback
-        ms = int(input("ms between control feedback: "))
-        # number of data points to run test for (each data point is 10 ms apart)
-        num = int(5000/ms)
-        # Kp
-        serv.set_Kp(0.05)
-        # setpoint
-        input_setp = 100000
-        serv.set_setpoint(input_setp)
-        
-        # create empty lists for times and positions
-        positions = []
-        times = [float(ms)*x for x in range(num)]
-        
-        # repeatedly saves position value every 10 ms 
-        for n in range(num):
-            serv.set_setpoint(input_setp)
-            time.sleep_ms(ms)
-            positions.append(serv.encoder.read())
-            print(f"{times[n]}, {serv.encoder.read()}")
-        # stop motor at end of test
-        serv.run(0)
-        enc.zero()
-        # print End to signal end of data transmission
-        print('End')
-            
-    
\ No newline at end of file
+    # run tests as the host asks for them, without rebooting in between
+    CommandServer(serv, log, pyb.USB_VCP(), EncoderRecorder(enc, 2000)).serve()
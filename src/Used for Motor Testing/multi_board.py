@@ -0,0 +1,226 @@
+"""! @file multi_board.py
+Runs the response test on several boards at once. Every board is driven
+through its own BoardClient on its own thread, so a slow or silent board
+never holds up the others, and the Tk window checks on them from its event
+loop instead of waiting. The traces are put on one time axis using the
+boards' own clocks: each board's clock is measured against the host's
+before the run, and its samples are placed from the ticks_us time its run
+started. The result is plotted in one window or kept in a RunStore.
+
+    python "src/Used for Motor Testing/multi_board.py" COM7 COM8 --store runs
+
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import argparse
+import threading
+import numpy as np
+from live_plot import RingBuffer
+from board_client import BoardClient
+from decimated_line import DecimatedLine
+
+
+class BoardRun(threading.Thread):
+    """!
+    This thread measures one board's clock, runs one test on it and moves
+    the samples into a ring buffer
+    """
+
+    def __init__(self, board, buffer):
+        """!
+        Creates the run; call start() to begin
+        @param board BoardClient of a board with its test settings made
+        @param buffer RingBuffer receiving (time, position) samples
+        """
+        super().__init__(daemon=True)
+        self.board = board
+        self.buffer = buffer
+        self.error = None
+
+    def run(self):
+        try:
+            self.board.sync()
+            times, positions = self.board.run()
+            self.buffer.extend(np.column_stack((times, positions)))
+        except Exception as err:
+            self.error = err
+
+
+class MultiBoardAcquisition:
+    """!
+    This class runs (time, position) tests on several boards in parallel
+    """
+
+    def __init__(self, boards, capacity=100000):
+        """!
+        Sets up one ring buffer per board; call start() to run a test
+        @param boards Dict of BoardClient by name, such as the port name,
+               with the test settings already made with configure()
+        @param capacity Samples kept per board
+        """
+        self.boards = dict(boards)
+        self.buffers = {name: RingBuffer(capacity) for name in self.boards}
+        self.runs = {}
+
+    @classmethod
+    def open(cls, ports, reset=False, capacity=100000):
+        """!
+        Opens every board's serial port, named by its port
+        @param ports Serial port names, such as ('COM7', 'COM8')
+        @param reset True to restart main.py on the boards first
+        @param capacity Samples kept per board
+        """
+        return cls({port: BoardClient.open(port, reset=reset) for port in ports},
+                   capacity)
+
+    def close(self):
+        for board in self.boards.values():
+            board.close()
+
+    def start(self):
+        """!
+        Starts a test on every board, dropping the samples of the last one
+        """
+        for buffer in self.buffers.values():
+            buffer.clear()
+        self.runs = {name: BoardRun(board, self.buffers[name])
+                     for name, board in self.boards.items()}
+        for run in self.runs.values():
+            run.start()
+
+    def cancel(self):
+        """!
+        Ends every board's run early; the samples so far still arrive
+        """
+        for board in self.boards.values():
+            board.stop()
+
+    def running(self):
+        """!
+        Returns True while any board is still running or sending
+        """
+        return any(run.is_alive() for run in self.runs.values())
+
+    def wait(self, timeout=None):
+        """!
+        Waits for every board to finish; from a Tk window use poll() instead
+        @param timeout Seconds to wait for each board, or None for no limit
+        """
+        for run in self.runs.values():
+            run.join(timeout)
+
+    def poll(self, widget, done, interval_ms=100):
+        """!
+        Calls done() from the Tk event loop once every board has finished,
+        checking every interval_ms so the window keeps responding meanwhile
+        @param widget Tk widget whose after() schedules the checks
+        @param done Function taking no arguments
+        @param interval_ms Time between checks in ms
+        """
+        def check():
+            if self.running():
+                widget.after(interval_ms, check)
+            else:
+                done()
+        check()
+
+    def errors(self):
+        """!
+        Returns the exception that ended each failed run, by board name
+        """
+        return {name: run.error for name, run in self.runs.items()
+                if run.error is not None}
+
+    def aligned(self):
+        """!
+        Returns the samples of every board on one time axis. Each board's
+        times are shifted by the host time its run started at, found from
+        its clock, less that of the board that started first.
+        @returns Dict of (samples, 2) arrays of time in ms and position, by
+                 board name
+        """
+        starts = {name: board.host_time(board.start_us)
+                  for name, board in self.boards.items()
+                  if board.clock is not None and board.start_us is not None}
+        first = min(starts.values(), default=0.0)
+        traces = {}
+        for name in self.boards:
+            data = self.buffers[name].snapshot()
+            data[:, 0] += (starts.get(name, first) - first)*1000
+            traces[name] = data
+        return traces
+
+    def plot(self, plot_axes):
+        """!
+        Draws every board's trace on one set of axes
+        @param plot_axes Matplotlib axes to draw on
+        """
+        for name, data in self.aligned().items():
+            DecimatedLine(plot_axes, data[:, 0], data[:, 1], label=name)
+        plot_axes.legend()
+
+    def save(self, store, kp, period_ms, setpoint, firmware=None):
+        """!
+        Keeps every board's aligned trace in a RunStore, with the board name
+        as its port
+        @param store RunStore to add the runs to
+        @param kp Proportional gain of the runs
+        @param period_ms Control period of the runs in ms
+        @param setpoint Setpoint of the runs in encoder ticks
+        @param firmware Firmware hash; run_store.firmware_hash() if None
+        @returns List of the new index entries
+        """
+        from run_store import firmware_hash
+        if firmware is None:
+            firmware = firmware_hash()
+        return [store.save(data[:, 0], data[:, 1], kp, period_ms, setpoint,
+                           firmware, port=name)
+                for name, data in self.aligned().items() if len(data)]
+
+
+if __name__ == "__main__":
+    from response_test_lab4 import tk_matplot, KP, SETPOINT
+    from run_store import RunStore
+
+    parser = argparse.ArgumentParser(description='Response test on several boards at once')
+    parser.add_argument('ports', nargs='+', help='serial ports, such as COM7 COM8')
+    parser.add_argument('--period', type=int, default=50, help='control period in ms')
+    parser.add_argument('--binary', action='store_true', help='receive binary frames')
+    parser.add_argument('--reset', action='store_true',
+                        help='restart main.py on the boards first, if they are at the REPL')
+    parser.add_argument('--store', help='RunStore folder to keep the runs in')
+    args = parser.parse_args()
+
+    boards = MultiBoardAcquisition.open(args.ports, reset=args.reset)
+    for board in boards.boards.values():
+        board.configure(kp=KP, period_ms=args.period, setpoint=SETPOINT,
+                        binary=args.binary)
+
+    def run_all(plot_axes, plot_canvas, xlabel, ylabel):
+        if boards.running():
+            return
+
+        def done():
+            for name, error in boards.errors().items():
+                print(f"{name}: {error}")
+            if args.store:
+                boards.save(RunStore(args.store), KP, args.period, SETPOINT)
+            boards.plot(plot_axes)
+            plot_axes.set_xlabel(xlabel)
+            plot_axes.set_ylabel(ylabel)
+            plot_axes.grid(True)
+            plot_canvas.draw()
+
+        boards.start()
+        boards.poll(plot_canvas.get_tk_widget(), done)
+
+    try:
+        tk_matplot(run_all,
+                   xlabel="Time (ms)",
+                   ylabel="Position (Ticks)",
+                   title=f"Responses of {len(args.ports)} Boards, Feedback Time = {args.period} ms",
+                   cancel_function=boards.cancel)
+    finally:
+        boards.close()
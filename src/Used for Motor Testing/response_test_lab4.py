@@ -7,6 +7,7 @@ This becomes graphed onto a a TK window with a Matplotlib plot
 @date 2024-2-21
 """
 
+import sys
 import math
 import time
 import tkinter
@@ -14,47 +15,120 @@ import serial
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import (FigureCanvasTkAgg,
                                                NavigationToolbar2Tk)
+from live_plot import RingBuffer, SerialStreamReader, LivePlot
+from run_store import RunStore
+from board_client import BoardClient
+from decimated_line import DecimatedLine
 
+## Control period requested from the board, in ms
+PERIOD_MS = 50
+## Gain and setpoint the board's response test uses, kept with each run
+KP = 0.05
+SETPOINT = 100000
 
-def plot_example(plot_axes, plot_canvas, xlabel, ylabel):
+
+def plot_example(plot_axes, plot_canvas, xlabel, ylabel, binary=False, rerun=False):
     """!
-    Resets the target arduino and formats the time and distance the motor has travelled
+    Runs a test on the target board and formats the time and distance the motor has travelled
     from the arduino into a list to be plotted.
     Calls 'End' when enough data has been gathered
     @param plot_axes The function that plots the given data onto the generated axes
     @param plot_canvas The function that displays the plot
     @param xlabel The label for the plot's horizontal axis
     @param ylabel The label for the plot's vertical axis
+    @param binary True to have the board send binary frames instead of text
+    @param rerun True to run the motor even if the store already holds this run
     
     """
-    timeExp = []
-    posExp = []
-    with serial.Serial('COM7') as ser:  
-        ser.write(b'\x03')
-        ser.write(b'\x04')
-        ser.write(b'50\r\n')
-        while True:
-            data = ser.readline().decode('utf-8')
-            if ',' in data:
-                squib = data.strip().split(',')
-                try:
-                    timeExp.append(float(squib[0]))
-                    posExp.append(int(squib[1]))
-                except ValueError:
-                    continue
-            elif 'End' in data:
-                break
-            else:
-                continue
+    def run():
+        board = connect()
+        board.configure(kp=KP, period_ms=PERIOD_MS, setpoint=SETPOINT, binary=binary)
+        return board.run()
+    # a configuration already in the store is loaded instead of run again
+    if store is None:
+        timeExp, posExp = run()
+    else:
+        entry, (timeExp, posExp) = store.run_or_load(run, KP, PERIOD_MS, SETPOINT,
+                                                     refresh=rerun)
     # Draw the plot. Of course, the axes must be labeled. A grid is optional
-    plot_axes.plot(timeExp, posExp)
+    # long runs are drawn at screen resolution, full detail when zoomed in
+    DecimatedLine(plot_axes, timeExp, posExp)
+    plot_axes.set_xlabel(xlabel)
+    plot_axes.set_ylabel(ylabel)
+    plot_axes.grid(True)
+    plot_canvas.draw()
+
+
+def connect():
+    """!
+    Opens the board's serial port the first time it is needed and keeps it
+    open, so later runs start without rebooting the board
+    @returns The BoardClient
+    """
+    global board
+    if board is None:
+        board = BoardClient.open('COM7', reset=True)
+    return board
+
+
+def overlay_runs(plot_axes, plot_canvas, xlabel, ylabel):
+    """!
+    Plots every stored run with the current period together
+    @param plot_axes The function that plots the given data onto the generated axes
+    @param plot_canvas The function that displays the plot
+    @param xlabel The label for the plot's horizontal axis
+    @param ylabel The label for the plot's vertical axis
+    """
+    store.overlay(plot_axes, store.find(period_ms=PERIOD_MS))
     plot_axes.set_xlabel(xlabel)
     plot_axes.set_ylabel(ylabel)
     plot_axes.grid(True)
     plot_canvas.draw()
 
 
-def tk_matplot(plot_function, xlabel, ylabel, title):
+def stream_example(plot_axes, plot_canvas, xlabel, ylabel, binary=False):
+    """!
+    Runs the same test as plot_example but draws the data while it arrives.
+    The serial port is read on a background thread so the window keeps
+    responding, and the run can be stopped with cancel_stream(). Like
+    plot_example, it keeps the board's command server running between runs.
+    @param plot_axes The function that plots the given data onto the generated axes
+    @param plot_canvas The function that displays the plot
+    @param xlabel The label for the plot's horizontal axis
+    @param ylabel The label for the plot's vertical axis
+    @param binary True to have the board send binary frames instead of text
+    """
+    global live
+    if live is not None and live.reader.is_alive():
+        return
+    plot_axes.set_xlabel(xlabel)
+    plot_axes.set_ylabel(ylabel)
+    plot_axes.grid(True)
+    board = connect()
+    board.configure(kp=KP, period_ms=PERIOD_MS, setpoint=SETPOINT, binary=binary)
+    live = LivePlot(plot_axes, plot_canvas, RingBuffer(100000))
+    live.start(SerialStreamReader(board, live.buffer))
+
+
+def cancel_stream():
+    """!
+    Stops a run started by stream_example
+    """
+    if live is not None:
+        live.cancel()
+
+
+## The streaming plot of the latest run, if any
+live = None
+
+## Connection to the board's command server, once opened
+board = None
+
+## Where finished runs are kept, or None to keep nothing
+store = None
+
+
+def tk_matplot(plot_function, xlabel, ylabel, title, cancel_function=None):
     """!
     Create a TK window with one embedded Matplotlib plot.
     This function makes the window, displays it, and runs the user interface
@@ -65,6 +139,8 @@ def tk_matplot(plot_function, xlabel, ylabel, title):
     @param xlabel The label for the plot's horizontal axis
     @param ylabel The label for the plot's vertical axis
     @param title A title for the plot; it shows up in window title bar
+    @param cancel_function Function stopping a run in progress; if given, a
+           Cancel button is added
     """
     # Create the main program window and give it a title
     tk_root = tkinter.Tk()
@@ -97,6 +173,11 @@ def tk_matplot(plot_function, xlabel, ylabel, title):
     button_run.grid(row=2, column=0)
     button_clear.grid(row=2, column=1)
     button_quit.grid(row=2, column=2)
+    if cancel_function is not None:
+        button_cancel = tkinter.Button(master=tk_root,
+                                       text="Cancel",
+                                       command=cancel_function)
+        button_cancel.grid(row=2, column=3)
 
     # This function runs the program until the user decides to quit
     tkinter.mainloop()
@@ -105,9 +186,28 @@ def tk_matplot(plot_function, xlabel, ylabel, title):
 # This main code is run if this file is the main program but won't run if this
 # file is imported as a module by some other main program
 if __name__ == "__main__":
-    tk_matplot(plot_example,
-               xlabel="Time (ms)",
-               ylabel="Position (Ticks)",
-               title="Experimental Response, Feedback Time = 50 ms")
+    # run with --binary to receive binary frames instead of text lines and
+    # with --live to draw the data as it arrives. Runs are kept in the runs
+    # folder; --rerun runs the motor even when a run is stored, and
+    # --overlay shows the stored runs instead of running the motor
+    binary = '--binary' in sys.argv
+    store = RunStore('runs')
+    if '--overlay' in sys.argv:
+        tk_matplot(overlay_runs,
+                   xlabel="Time (ms)",
+                   ylabel="Position (Ticks)",
+                   title=f"Stored Responses, Feedback Time = {PERIOD_MS} ms")
+    elif '--live' in sys.argv:
+        tk_matplot(lambda *args: stream_example(*args, binary=binary),
+                   xlabel="Time (ms)",
+                   ylabel="Position (Ticks)",
+                   title=f"Experimental Response, Feedback Time = {PERIOD_MS} ms",
+                   cancel_function=cancel_stream)
+    else:
+        tk_matplot(lambda *args: plot_example(*args, binary=binary,
+                                              rerun='--rerun' in sys.argv),
+                   xlabel="Time (ms)",
+                   ylabel="Position (Ticks)",
+                   title=f"Experimental Response, Feedback Time = {PERIOD_MS} ms")
 
 
@@ -0,0 +1,155 @@
+"""! @file run_store.py
+Keeps every step response run on disk so it can be looked up, overlaid and
+reused later. Each run is one .npy file holding its time and position
+columns, opened memory-mapped so hundreds of runs need not fit in RAM, and
+an index file lists the Kp, period, setpoint and firmware hash of every run.
+A run whose configuration was already measured with the same firmware is
+loaded from the store instead of running the motor again.
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import hashlib
+import json
+import os
+import time
+import numpy as np
+from decimated_line import DecimatedLine
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+## Files copied to the board for the response test, hashed to tell
+## firmware versions apart
+FIRMWARE_FILES = tuple(os.path.join(_HERE, name) for name in
+                       ('main.py', 'command_server.py', 'motor_driver_updated.py',
+                        'encoder_reader_updated.py', 'telemetry.py',
+                        os.path.join(os.pardir, 'sample_logger.py'),
+                        os.path.join(os.pardir, 'encoder_recorder.py')))
+
+## Index entries that together identify a configuration
+CONFIG_KEYS = ('kp', 'period_ms', 'setpoint', 'firmware')
+
+
+def firmware_hash(paths=FIRMWARE_FILES):
+    """!
+    Hashes the board source files
+    @param paths Files to hash; missing ones are skipped
+    @returns First 12 hex digits of the SHA-1 of their contents
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, 'rb') as file:
+                digest.update(file.read())
+    return digest.hexdigest()[:12]
+
+
+class RunStore:
+    """!
+    This class stores runs in a folder: index.json plus one .npy per run
+    """
+
+    def __init__(self, root='runs'):
+        """!
+        Opens a store, creating its folder if needed
+        @param root Folder holding the index and the run files
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.index_path = os.path.join(root, 'index.json')
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as file:
+                self.index = json.load(file)
+        else:
+            self.index = []
+
+    def _write_index(self):
+        # write a new file, then swap it in, so a crash leaves the old index
+        temp = self.index_path + '.tmp'
+        with open(temp, 'w') as file:
+            json.dump(self.index, file, indent=1)
+        os.replace(temp, self.index_path)
+
+    def save(self, times, positions, kp, period_ms, setpoint, firmware, **extra):
+        """!
+        Adds a run to the store
+        @param times Sample times in ms
+        @param positions Positions in encoder ticks
+        @param kp Proportional gain of the run
+        @param period_ms Control period of the run in ms
+        @param setpoint Setpoint of the run in encoder ticks
+        @param firmware Firmware hash, see firmware_hash()
+        @param extra Any other metadata to keep in the index
+        @returns The new index entry
+        """
+        number = max((entry['id'] for entry in self.index), default=0) + 1
+        name = f"run{number:05d}.npy"
+        data = np.array((times, positions), dtype=np.float64)
+        np.save(os.path.join(self.root, name), data)
+        entry = dict(id=number, file=name, kp=kp, period_ms=period_ms,
+                     setpoint=setpoint, firmware=firmware, samples=data.shape[1],
+                     created=time.strftime('%Y-%m-%d %H:%M:%S'), **extra)
+        self.index.append(entry)
+        self._write_index()
+        return entry
+
+    def find(self, **query):
+        """!
+        Finds runs whose metadata matches, such as find(kp=0.05, period_ms=30)
+        @returns List of index entries, oldest first
+        """
+        return [entry for entry in self.index
+                if all(entry.get(key) == value for key, value in query.items())]
+
+    def cached(self, kp, period_ms, setpoint, firmware):
+        """!
+        Returns the newest run of a configuration, or None if it was never run
+        """
+        found = self.find(kp=kp, period_ms=period_ms, setpoint=setpoint,
+                          firmware=firmware)
+        return found[-1] if found else None
+
+    def load(self, entry):
+        """!
+        Opens a run memory-mapped; only the parts used are read from disk
+        @param entry Index entry, or run id
+        @returns Read-only array, row 0 holding times and row 1 positions
+        """
+        if not isinstance(entry, dict):
+            entry = self.find(id=entry)[0]
+        return np.load(os.path.join(self.root, entry['file']), mmap_mode='r')
+
+    def run_or_load(self, run, kp, period_ms, setpoint, firmware=None, refresh=False):
+        """!
+        Returns a configuration's run from the store, running it only if the
+        store does not hold it yet
+        @param run Function taking no arguments that runs the test and returns
+               lists of times and positions
+        @param kp Proportional gain of the run
+        @param period_ms Control period of the run in ms
+        @param setpoint Setpoint of the run in encoder ticks
+        @param firmware Firmware hash; firmware_hash() if None
+        @param refresh True to run again even if the store holds the run
+        @returns Tuple of the index entry and the array from load()
+        """
+        if firmware is None:
+            firmware = firmware_hash()
+        entry = None if refresh else self.cached(kp, period_ms, setpoint, firmware)
+        if entry is None:
+            times, positions = run()
+            entry = self.save(times, positions, kp, period_ms, setpoint, firmware)
+        return entry, self.load(entry)
+
+    def overlay(self, plot_axes, entries):
+        """!
+        Plots several runs on one set of axes, labelled by configuration
+        @param plot_axes Matplotlib axes to draw on
+        @param entries Index entries to plot
+        """
+        for entry in entries:
+            data = self.load(entry)
+            DecimatedLine(plot_axes, data[0], data[1],
+                          label=f"#{entry['id']} Kp {entry['kp']}, {entry['period_ms']} ms")
+        if entries:
+            plot_axes.legend()
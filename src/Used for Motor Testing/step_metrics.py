@@ -0,0 +1,161 @@
+"""! @file step_metrics.py
+Computes rise time, overshoot, settling time and steady-state error of step
+responses. Any number of (time, position) traces are padded into one array
+and measured together with NumPy, so thousands of traces take a fraction of
+a second. Works on the lists plot_example reads, on runs in a RunStore and
+on CSV files with time and position columns.
+
+    python "src/Used for Motor Testing/step_metrics.py" runs --setpoint 100000
+
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import argparse
+import os
+import numpy as np
+
+## Names of the values metrics() returns, in table order
+METRICS = ('rise_ms', 'overshoot_pct', 'settling_ms', 'steady_state_error',
+           'final_error')
+
+
+def pack(traces):
+    """!
+    Pads traces of different lengths into two arrays
+    @param traces Sequence of (times, positions) pairs
+    @returns Tuple of times and positions, shape (traces, longest), NaN padded
+    """
+    longest = max((len(t) for t, p in traces), default=0)
+    times = np.full((len(traces), longest), np.nan)
+    positions = np.full((len(traces), longest), np.nan)
+    for row, (t, p) in enumerate(traces):
+        times[row, :len(t)] = t
+        positions[row, :len(p)] = p
+    return times, positions
+
+
+def _first(mask):
+    # index of the first True in each row, -1 if none
+    return np.where(mask.any(axis=1), np.argmax(mask, axis=1), -1)
+
+
+def metrics(times, positions, setpoint, start=0.0, band=0.02, rise=(0.1, 0.9),
+            tail=0.1):
+    """!
+    Measures step responses
+    @param times Sample times in ms, shape (traces, samples), NaN padded
+    @param positions Positions in encoder ticks, same shape
+    @param setpoint Setpoint of each trace, or one for all
+    @param start Position each trace started from, or one for all
+    @param band Settling band as a fraction of the step size
+    @param rise Fractions of the step between which the rise time is taken
+    @param tail Fraction of the samples at the end of each trace averaged
+           for the steady-state error
+    @returns Dict of arrays, one value per trace, keyed by the names in
+             METRICS. Times that never happened, such as the settling time
+             of a trace that never settles, are inf.
+    """
+    times = np.atleast_2d(np.asarray(times, dtype=float))
+    positions = np.atleast_2d(np.asarray(positions, dtype=float))
+    n = len(positions)
+    if positions.shape[1] == 0:
+        times = positions = np.full((n, 1), np.nan)
+    setpoint = np.broadcast_to(np.asarray(setpoint, dtype=float), (n,))[:, None]
+    start = np.broadcast_to(np.asarray(start, dtype=float), (n,))[:, None]
+    rows = np.arange(n)
+    step = setpoint - start
+    span = np.where(step == 0, 1.0, np.abs(step))
+    valid = ~np.isnan(positions)
+    count = valid.sum(axis=1)
+    # padding is pushed past the end of the time axis so it never wins
+    padded_times = np.where(valid, times, np.inf)
+
+    # fraction of the step covered, 1 at the setpoint, in either direction
+    progress = np.where(step == 0, 0.0, (positions - start)/np.where(step == 0, 1.0, step))
+    low = _first(progress >= rise[0])
+    high = _first(progress >= rise[1])
+    rise_ms = np.where((low >= 0) & (high >= 0),
+                       padded_times[rows, high] - padded_times[rows, low], np.inf)
+
+    ahead = np.nanmax(np.where(valid, progress, -np.inf), axis=1) - 1.0
+    overshoot = np.maximum(ahead, 0.0)*100
+
+    outside = np.abs(positions - setpoint) > band*span
+    # last sample outside the band; settled from the following one
+    last = np.where(outside.any(axis=1),
+                    outside.shape[1] - 1 - np.argmax(outside[:, ::-1], axis=1), -1)
+    settled = (last < count - 1) & (count > 0)
+    after = np.minimum(last + 1, positions.shape[1] - 1)
+    settling = np.where(settled, padded_times[rows, after], np.inf)
+
+    index = np.arange(positions.shape[1])
+    keep = np.maximum(np.ceil(tail*count), 1)[:, None]
+    in_tail = valid & (index >= (count[:, None] - keep))
+    error = np.where(in_tail, positions - setpoint, 0.0)
+    steady = error.sum(axis=1)/np.maximum(in_tail.sum(axis=1), 1)
+    final = positions[rows, np.maximum(count - 1, 0)] - setpoint[:, 0]
+
+    return dict(rise_ms=rise_ms, overshoot_pct=overshoot, settling_ms=settling,
+                steady_state_error=steady, final_error=final)
+
+
+def trace_metrics(traces, setpoint, **options):
+    """!
+    Measures a list of traces, such as several plot_example runs
+    @param traces Sequence of (times, positions) pairs
+    @param setpoint Setpoint of each trace, or one for all
+    @param options Other arguments of metrics()
+    @returns Dict of arrays as metrics() returns
+    """
+    times, positions = pack(traces)
+    return metrics(times, positions, setpoint, **options)
+
+
+def format_table(names, results):
+    """!
+    Formats metrics as aligned text lines, one per trace
+    @param names Label of each trace
+    @param results Dict returned by metrics()
+    """
+    lines = ['{:<24}'.format('run') + ''.join(f'{m:>20}' for m in METRICS)]
+    for i, name in enumerate(names):
+        lines.append(f'{name:<24}' + ''.join(f'{results[m][i]:>20.2f}' for m in METRICS))
+    return '\n'.join(lines)
+
+
+def _load(paths, setpoint):
+    # RunStore folders give every run with its setpoint; CSV files need one
+    from run_store import RunStore
+    names = []
+    traces = []
+    setpoints = []
+    for path in paths:
+        if os.path.isdir(path):
+            store = RunStore(path)
+            for entry in store.index:
+                data = store.load(entry)
+                names.append(f"#{entry['id']} Kp {entry['kp']} {entry['period_ms']} ms")
+                traces.append((data[0], data[1]))
+                setpoints.append(entry['setpoint'] if setpoint is None else setpoint)
+        else:
+            data = np.loadtxt(path, delimiter=',', ndmin=2)
+            names.append(os.path.basename(path))
+            traces.append((data[:, 0], data[:, 1]))
+            setpoints.append(100000 if setpoint is None else setpoint)
+    return names, traces, setpoints
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Step response metrics')
+    parser.add_argument('paths', nargs='+',
+                        help='RunStore folders or CSV files of time, position lines')
+    parser.add_argument('--setpoint', type=float,
+                        help='setpoint in ticks; stored runs default to their own')
+    parser.add_argument('--band', type=float, default=0.02,
+                        help='settling band as a fraction of the step')
+    args = parser.parse_args()
+
+    names, traces, setpoints = _load(args.paths, args.setpoint)
+    print(format_table(names, trace_metrics(traces, setpoints, band=args.band)))
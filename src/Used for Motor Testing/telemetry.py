@@ -0,0 +1,329 @@
+"""! @file telemetry.py
+Binary framing for sample data sent from the board to the PC. Samples are
+packed into fixed size frames of 32-bit integer records; every frame starts
+with a sync word and a sequence number and ends with a CRC-32, so the PC can
+find frames in the serial stream, drop damaged ones and report lost ones.
+The board side (TelemetryWriter) only needs struct and binascii; the PC side
+(TelemetryReader, decode_frames) decodes many frames at once with NumPy.
+
+Frame layout, little endian:
+    sync     uint16  0x5AA5
+    seq      uint16  frame number, wraps at 65536
+    count    uint8   records used in this frame; 0 marks the end of a run
+    fields   uint8   32-bit integers per record
+    slots    uint8   records the frame has room for
+    reserved uint8
+    records  int32 * fields * slots
+    crc      uint32  CRC-32 of everything before it
+
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import struct
+import binascii
+import time
+
+## Sync word starting every frame
+SYNC = 0x5AA5
+## Sync word as it appears in the byte stream
+SYNC_BYTES = b'\xa5\x5a'
+## Header format: sync, sequence number, count, fields, slots, reserved
+HEADER = '<HHBBBB'
+HEADER_SIZE = struct.calcsize(HEADER)
+CRC_SIZE = 4
+
+## Columns of a response test record, as logged by sample_logger.py
+TIME, SETPOINT, POSITION, DUTY = range(4)
+
+
+def frame_size(fields, slots):
+    """!
+    Returns the size in bytes of a frame
+    @param fields 32-bit integers per record
+    @param slots Records per frame
+    """
+    return HEADER_SIZE + 4*fields*slots + CRC_SIZE
+
+
+class TelemetryWriter:
+    """!
+    This class packs records into frames on the board and writes each frame
+    to the serial port when it fills. The frame buffer is allocated once.
+    """
+
+    def __init__(self, stream, fields=2, slots=16):
+        """!
+        Creates a writer
+        @param stream Object with a write() method, such as pyb.USB_VCP()
+        @param fields 32-bit integers per record
+        @param slots Records per frame
+        """
+        self.stream = stream
+        self.fields = fields
+        self.slots = slots
+        self.buf = bytearray(frame_size(fields, slots))
+        self.mv = memoryview(self.buf)
+        self.fmt = '<' + 'i'*fields
+        self.crc_at = len(self.buf) - CRC_SIZE
+        self.seq = 0
+        self.count = 0
+
+    def add(self, *values):
+        """!
+        Adds one record, sending the frame if it is now full
+        @param values One integer per field
+        """
+        struct.pack_into(self.fmt, self.buf,
+                         HEADER_SIZE + 4*self.fields*self.count, *values)
+        self.count += 1
+        if self.count == self.slots:
+            self.flush()
+
+    def add_block(self, records):
+        """!
+        Sends many records stored back to back, for example in an
+        array('i'). Whole frames are written straight from the records.
+        @param records memoryview of 32-bit integers, fields per record
+        """
+        width = self.fields
+        full = self.slots*width
+        i = 0
+        end = len(records)
+        while self.count or end - i < full:
+            if i == end:
+                return
+            self.add(*records[i:i + width])
+            i += width
+        while end - i >= full:
+            struct.pack_into(HEADER, self.buf, 0, SYNC, self.seq, self.slots,
+                             self.fields, self.slots, 0)
+            block = records[i:i + full]
+            crc = binascii.crc32(block, binascii.crc32(self.mv[:HEADER_SIZE]))
+            struct.pack_into('<I', self.buf, self.crc_at, crc & 0xFFFFFFFF)
+            self.stream.write(self.mv[:HEADER_SIZE])
+            self.stream.write(block)
+            self.stream.write(self.mv[self.crc_at:])
+            self.seq = (self.seq + 1) & 0xFFFF
+            i += full
+        while i < end:
+            self.add(*records[i:i + width])
+            i += width
+
+    def flush(self):
+        """!
+        Sends the records added so far, if any
+        """
+        if self.count:
+            self._send()
+
+    def end(self):
+        """!
+        Sends the remaining records and then an empty frame marking the end
+        of the run
+        """
+        self.flush()
+        self._send()
+        self.seq = 0
+
+    def _send(self):
+        struct.pack_into(HEADER, self.buf, 0, SYNC, self.seq, self.count,
+                         self.fields, self.slots, 0)
+        struct.pack_into('<I', self.buf, self.crc_at,
+                         binascii.crc32(self.mv[:self.crc_at]) & 0xFFFFFFFF)
+        self.stream.write(self.buf)
+        self.seq = (self.seq + 1) & 0xFFFF
+        self.count = 0
+
+
+def decode_frames(buf):
+    """!
+    Finds and checks every complete frame in a block of received bytes and
+    unpacks their records in one pass. Bytes before the first frame, such as
+    REPL text, and frames with a bad CRC are skipped.
+    @param buf Received bytes
+    @returns Tuple of (records, seqs, used, ended, bad): an int32 array of
+             shape (records, fields), with no columns if no good frame was
+             found, the sequence number of each good frame,
+             how many bytes were consumed, whether an end frame was seen and
+             how many frames failed the CRC check
+    """
+    import numpy as np
+
+    data = np.frombuffer(buf, dtype=np.uint8)
+    starts = []
+    pos = buf.find(SYNC_BYTES)
+    # keep a trailing byte that may be the first half of a sync word
+    used = max(len(buf) - 1, 0) if pos < 0 else pos
+    ended = False
+    bad = 0
+    size = None
+    width = 0
+    while 0 <= pos and pos + HEADER_SIZE <= len(buf):
+        sync, seq, count, fields, slots, _ = struct.unpack_from(HEADER, buf, pos)
+        this = frame_size(fields, slots)
+        if (size is not None and this != size or count > slots
+                or not fields or not slots):
+            pos = buf.find(SYNC_BYTES, pos + 1)
+            continue
+        if pos + this > len(buf):
+            break
+        crc, = struct.unpack_from('<I', buf, pos + this - CRC_SIZE)
+        if binascii.crc32(buf[pos:pos + this - CRC_SIZE]) & 0xFFFFFFFF != crc:
+            bad += 1
+            pos = buf.find(SYNC_BYTES, pos + 1)
+            used = len(buf) if pos < 0 else pos
+            continue
+        size = this
+        width = fields
+        pos += this
+        used = pos
+        if count == 0:
+            ended = True
+            break
+        starts.append(pos - this)
+        pos = buf.find(SYNC_BYTES, pos) if buf[pos:pos + 2] != SYNC_BYTES else pos
+
+    if not starts:
+        return (np.empty((0, width), dtype=np.int32), np.empty(0, np.uint16),
+                used, ended, bad)
+    starts = np.array(starts)
+    frames = data[starts[:, None] + np.arange(size)]
+    header = frames[:, :HEADER_SIZE].copy()
+    seqs = header[:, 2:4].view('<u2').ravel()
+    counts = header[:, 4]
+    fields = int(header[0, 5])
+    slots = int(header[0, 6])
+    records = frames[:, HEADER_SIZE:size - CRC_SIZE].copy().view('<i4')
+    records = records.reshape(len(starts), slots, fields)
+    keep = np.arange(slots)[None, :] < counts[:, None]
+    return records[keep], seqs, used, ended, bad
+
+
+class TelemetryReader:
+    """!
+    This class collects frames from the serial port on the PC. Bytes are
+    decoded in blocks as they arrive and lost frames are noted as gaps.
+    Decoded records are held until new_records() takes them, so a reader
+    that streams with new_records() only holds what arrived since its last
+    call; one that calls records() at the end of a run gets the whole run.
+    """
+
+    def __init__(self):
+        """!
+        Creates a reader with nothing received
+        """
+        self.pending = b''
+        ## Decoded records not yet taken by new_records(), one array per feed
+        self.chunks = []
+        self.next_seq = None
+        ## Missing frames as (expected sequence number, received sequence number)
+        self.gaps = []
+        self.bad_frames = 0
+        self.ended = False
+        ## Fields per record, from the first good frame, even an end frame
+        self.fields = 0
+
+    def feed(self, data):
+        """!
+        Decodes newly received bytes
+        @param data Bytes read from the port
+        @returns True once the end frame has arrived
+        """
+        import numpy as np
+
+        buf = self.pending + data
+        records, seqs, used, ended, bad = decode_frames(buf)
+        self.pending = buf[used:]
+        self.bad_frames += bad
+        if records.shape[1] and not self.fields:
+            self.fields = records.shape[1]
+        if len(seqs):
+            seqs = seqs.astype(np.int64)
+            if self.next_seq is not None:
+                seqs = np.concatenate(([self.next_seq - 1], seqs))
+            jumps = np.flatnonzero((np.diff(seqs) & 0xFFFF) != 1)
+            self.gaps.extend(((int(seqs[i]) + 1) & 0xFFFF, int(seqs[i + 1]))
+                             for i in jumps)
+            self.next_seq = (int(seqs[-1]) + 1) & 0xFFFF
+            self.chunks.append(records)
+        self.ended = self.ended or ended
+        return self.ended
+
+    def records(self):
+        """!
+        Returns every record received so far and not taken by new_records(),
+        as an int32 array with one row per record
+        """
+        import numpy as np
+
+        if not self.chunks:
+            return np.empty((0, self.fields), dtype=np.int32)
+        return np.concatenate(self.chunks)
+
+    def new_records(self):
+        """!
+        Returns the records received since the last call, as an int32 array
+        with one row per record, and lets the reader drop them
+        """
+        fresh = self.records()
+        self.chunks = []
+        return fresh
+
+
+def read_text(ser, timeout=30.0):
+    """!
+    Reads "time, position" lines until the board prints End
+    @param ser Open serial port with a read timeout, so reads return when
+           nothing arrives
+    @param timeout Seconds to wait for the whole run
+    @returns Lists of times and positions
+    """
+    timeExp = []
+    posExp = []
+    deadline = time.monotonic() + timeout
+    while True:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"No End from the board after {len(timeExp)} samples")
+        data = ser.readline().decode('utf-8')
+        if ',' in data:
+            squib = data.strip().split(',')
+            try:
+                timeExp.append(float(squib[0]))
+                posExp.append(int(squib[1]))
+            except ValueError:
+                continue
+        elif 'End' in data:
+            break
+    return timeExp, posExp
+
+
+def read_frames(ser, timeout=30.0):
+    """!
+    Reads binary telemetry frames until the board sends its end frame
+    @param ser Open serial port with a read timeout
+    @param timeout Seconds to wait for the whole run
+    @returns TelemetryReader holding the frames
+    """
+    reader = TelemetryReader()
+    deadline = time.monotonic() + timeout
+    while not reader.feed(ser.read(ser.in_waiting or 1)):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"No end frame from the board after "
+                               f"{len(reader.records())} records")
+    return reader
+
+
+def read_binary(ser, timeout=30.0):
+    """!
+    Reads binary telemetry frames until the board sends its end frame
+    @param ser Open serial port with a read timeout
+    @param timeout Seconds to wait for the whole run
+    @returns Lists of times and positions
+    """
+    reader = read_frames(ser, timeout)
+    if reader.gaps or reader.bad_frames:
+        print(f"Lost frames {reader.gaps}, {reader.bad_frames} failed CRC")
+    records = reader.records()
+    return records[:, TIME].tolist(), records[:, POSITION].tolist()
@@ -0,0 +1,152 @@
+"""! @file auto_tune.py
+Finds the slowest control period, and so the lowest CPU load, at which an
+axis still meets its move targets. The board drives the axis through
+MultiAxis with the same S-curve moves main.py uses, out and back for each
+candidate period and gain, measures overshoot and settling time itself, and
+saves the cheapest passing configuration to a small file that main.py reads
+at boot.
+Run this file as the main program on the board to tune the first axis of
+main.py's AXES table.
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import time
+from motion_profile import synchronized
+
+## File the chosen configuration is saved in
+CONFIG_FILE = 'tuning.json'
+
+
+def move_response(axes, axis, target, period_ms, duration_ms, band, limits):
+    """!
+    Moves one axis to a target and measures the response. The other axes
+    hold their setpoints, so the update costs what it does in main.py.
+    @param axes MultiAxis holding the axis
+    @param axis Axis number
+    @param target Position to move to, in encoder ticks
+    @param period_ms Control period in milliseconds
+    @param duration_ms Length of the run in milliseconds, from the start of
+           the move
+    @param band Settling band, in ticks either side of the target
+    @param limits Tuple of speed, acceleration and jerk limits of the move,
+           as main.py gives them to synchronized()
+    @returns Tuple of overshoot in ticks, settling time in ms from the start
+             of the move (-1 if it never settled) and final error in ticks
+    """
+    v_max, a_max, j_max = limits
+    enc = axes.encoders[axis]
+    start = axes.setpoint[axis]
+    axes.move(axis, synchronized([(start, target)], v_max, a_max, period_ms, j_max)[0])
+    direction = 1 if target >= start else -1
+    peak = 0
+    settled_at = -1
+    now = 0
+    deadline = time.ticks_ms()
+    while now < duration_ms:
+        axes.update()
+        error = enc.pos - target
+        ahead = error*direction
+        if ahead > peak:
+            peak = ahead
+        if error > band or error < -band:
+            settled_at = -1
+        elif settled_at < 0:
+            settled_at = now
+        deadline = time.ticks_add(deadline, period_ms)
+        wait = time.ticks_diff(deadline, time.ticks_ms())
+        if wait > 0:
+            time.sleep_ms(wait)
+        now += period_ms
+    axes.stop()
+    return peak, settled_at, enc.pos - target
+
+
+def tune(axes, axis, kps, periods_ms, limits, step=50000, max_overshoot_pct=5,
+         max_settling_ms=2000, duration_ms=3000, band_pct=2):
+    """!
+    Tries periods from slowest to fastest and, for each, every gain, moving
+    the axis out by one step and back each time. Stops at the first period
+    where some gain passes and picks the one that settles fastest.
+    @param axes MultiAxis holding the axis, set up; its motor must be free
+           to turn
+    @param axis Axis number
+    @param kps Proportional gains to try
+    @param periods_ms Control periods to try, in milliseconds
+    @param limits Tuple of speed, acceleration and jerk limits of the moves
+    @param step Size of every move in encoder ticks
+    @param max_overshoot_pct Largest acceptable overshoot in percent
+    @param max_settling_ms Longest acceptable settling time in milliseconds,
+           counted from the start of the move
+    @param duration_ms Length of each move in milliseconds
+    @param band_pct Settling band in percent of the step
+    @returns Dict with kp, period_ms, overshoot_pct and settling_ms of the
+             chosen configuration, or None if nothing passed
+    """
+    band = step*band_pct//100
+    home = axes.setpoint[axis]
+    for period in sorted(periods_ms, reverse=True):
+        axes.set_period(period)
+        best = None
+        for kp in kps:
+            axes.set_Kp(axis, kp)
+            worst_peak = 0
+            worst_settle = 0
+            # out and back, so each trial starts where the last one did
+            for target in (home + step, home):
+                peak, settle, final = move_response(axes, axis, target, period,
+                                                    duration_ms, band, limits)
+                worst_peak = max(worst_peak, peak)
+                if settle < 0 or worst_settle < 0:
+                    worst_settle = -1
+                else:
+                    worst_settle = max(worst_settle, settle)
+            overshoot_pct = 100*worst_peak/step
+            print(f"period {period} ms, Kp {kp}: overshoot {overshoot_pct:.1f} %, "
+                  f"settling {worst_settle} ms")
+            if (overshoot_pct <= max_overshoot_pct and 0 <= worst_settle <= max_settling_ms
+                    and (best is None or worst_settle < best['settling_ms'])):
+                best = dict(kp=kp, period_ms=period, overshoot_pct=overshoot_pct,
+                            settling_ms=worst_settle)
+        if best is not None:
+            return best
+    return None
+
+
+def save(result, path=CONFIG_FILE):
+    """!
+    Writes a tuning result for main.py to load at boot
+    """
+    import json
+    with open(path, 'w') as file:
+        json.dump(result, file)
+
+
+def load(path=CONFIG_FILE):
+    """!
+    Reads a saved tuning result
+    @returns Dict with at least kp and period_ms, or None if there is none
+    """
+    try:
+        with open(path) as file:
+            # json is imported only once there is a file to read, which keeps
+            # it off the boot path of a board that was never tuned
+            import json
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+if __name__ == "__main__":
+    from multi_axis import MultiAxis
+    from main import AXES, V_MAX, A_MAX, J_MAX
+
+    axes = MultiAxis(AXES)
+    result = tune(axes, 0, kps=(0.01, 0.02, 0.05, 0.1),
+                  periods_ms=(100, 50, 40, 30, 20, 10), limits=(V_MAX, A_MAX, J_MAX))
+    if result is None:
+        print("No configuration met the targets")
+    else:
+        save(result)
+        print(f"Saved {result} to {CONFIG_FILE}")
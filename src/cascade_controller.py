@@ -0,0 +1,224 @@
+"""! @file cascade_controller.py
+Cascaded position and velocity controller for the Servo class. A slow outer
+loop turns the position error into a speed command, and a fast inner loop
+drives the measured speed to it, so only the cheap inner update has to run
+at a high rate. Reference speed and acceleration, such as those of a motion
+profile, can be fed forward: the speed into the speed command, and both
+straight into the duty cycle, so the loops only correct what the
+feedforward misses. All arithmetic is on small integers, as in
+PIDController, so updates can run in a timer interrupt.
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import pyb
+
+## Fraction bits of the position gain
+POS_SHIFT = 8
+## Fraction bits of the speed and feedforward gains, which are small
+VEL_SHIFT = 20
+
+
+class CascadeController:
+    """!
+    This class computes a motor duty cycle from a position setpoint, the
+    measured position and the measured speed
+    """
+
+    def __init__(self, kp_pos, kp_vel, ki_vel=0.0, kff_vel=0.0, kff_acc=0.0,
+                 outer_every=5, period_ms=2, v_max=100000, limit=100):
+        """!
+        Creates a controller with no history
+        @param kp_pos Position gain, speed command in ticks/s per tick of error
+        @param kp_vel Speed gain in percent duty per tick/s of speed error
+        @param ki_vel Integral gain in percent duty per tick/s of speed error
+               per second
+        @param kff_vel Speed feedforward in percent duty per tick/s, about
+               1/gain of the motor model
+        @param kff_acc Acceleration feedforward in percent duty per tick/s^2,
+               about tau/gain of the motor model
+        @param outer_every Inner updates per outer update
+        @param period_ms Time between inner updates in milliseconds
+        @param v_max Largest speed command in ticks per second
+        @param limit Largest duty cycle magnitude in percent
+        """
+        self.integral = 0
+        self.count = 0
+        self.v_cmd = 0
+        self.kp_pos = kp_pos
+        self.kp_vel = kp_vel
+        self.ki_vel = ki_vel
+        self.kff_vel = kff_vel
+        self.kff_acc = kff_acc
+        self.outer_every = outer_every
+        self.period_ms = period_ms
+        self.v_max = v_max
+        self.limit = limit
+        self.set_gains()
+
+    def set_gains(self, kp_pos=None, kp_vel=None, ki_vel=None, kff_vel=None,
+                  kff_acc=None, outer_every=None, period_ms=None, v_max=None,
+                  limit=None):
+        """!
+        Changes any of the gains, rates or limits. Safe to call while
+        update() runs in an interrupt.
+        """
+        if kp_pos is not None:
+            self.kp_pos = kp_pos
+        if kp_vel is not None:
+            self.kp_vel = kp_vel
+        if ki_vel is not None:
+            self.ki_vel = ki_vel
+        if kff_vel is not None:
+            self.kff_vel = kff_vel
+        if kff_acc is not None:
+            self.kff_acc = kff_acc
+        if outer_every is not None:
+            self.outer_every = outer_every
+        if period_ms is not None:
+            self.period_ms = period_ms
+        if v_max is not None:
+            self.v_max = v_max
+        if limit is not None:
+            self.limit = limit
+        one = 1 << VEL_SHIFT
+        kpp_q = int(self.kp_pos*(1 << POS_SHIFT))
+        kpv_q = int(self.kp_vel*one)
+        kiv_q = int(self.ki_vel*self.period_ms/1000*one)
+        kfv_q = int(self.kff_vel*one)
+        kfa_q = int(self.kff_acc*one)
+        lim_q = self.limit << VEL_SHIFT
+        # as in PIDController, every input is clamped so its product stays
+        # within the output range, which keeps the sums small ints
+        state = pyb.disable_irq()
+        self.kpp_q = kpp_q
+        self.kpv_q = kpv_q
+        self.kiv_q = kiv_q
+        self.kfv_q = kfv_q
+        self.kfa_q = kfa_q
+        self.lim_q = lim_q
+        self.vmax = int(self.v_max)
+        self.e_lim = (self.vmax << POS_SHIFT)//max(abs(kpp_q), 1) + 1
+        self.ve_lim = lim_q//max(abs(kpv_q), 1) + 1
+        self.vi_lim = lim_q//max(abs(kiv_q), 1) + 1
+        self.fv_lim = lim_q//max(abs(kfv_q), 1) + 1
+        self.fa_lim = lim_q//max(abs(kfa_q), 1) + 1
+        self.integral = max(min(self.integral, lim_q), -lim_q)
+        pyb.enable_irq(state)
+
+    def reset(self):
+        """!
+        Clears the integral and the speed command
+        """
+        self.integral = 0
+        self.count = 0
+        self.v_cmd = 0
+
+    def outer(self, setpoint, measured, v_ref=0):
+        """!
+        Runs the position loop
+        @param setpoint Desired position in encoder ticks
+        @param measured Present position in encoder ticks
+        @param v_ref Reference speed in ticks per second, fed forward
+        @returns Speed command in ticks per second, within +/- v_max
+        """
+        e = setpoint - measured
+        lim = self.e_lim
+        if e > lim:
+            e = lim
+        elif e < -lim:
+            e = -lim
+        out = self.kpp_q*e
+        if out < 0:
+            v = -(-out >> POS_SHIFT) + v_ref
+        else:
+            v = (out >> POS_SHIFT) + v_ref
+        lim = self.vmax
+        if v > lim:
+            v = lim
+        elif v < -lim:
+            v = -lim
+        self.v_cmd = v
+        return v
+
+    def inner(self, velocity, v_ref=0, a_ref=0):
+        """!
+        Runs the speed loop towards the last speed command
+        @param velocity Measured speed in ticks per second
+        @param v_ref Reference speed in ticks per second, fed forward
+        @param a_ref Reference acceleration in ticks per second squared, fed
+               forward
+        @returns Duty cycle in whole percent, within +/- limit
+        """
+        lim_q = self.lim_q
+        error = self.v_cmd - velocity
+
+        e = error
+        lim = self.ve_lim
+        if e > lim:
+            e = lim
+        elif e < -lim:
+            e = -lim
+        out = self.kpv_q*e
+
+        if self.kfv_q:
+            lim = self.fv_lim
+            if v_ref > lim:
+                v_ref = lim
+            elif v_ref < -lim:
+                v_ref = -lim
+            out += self.kfv_q*v_ref
+        if self.kfa_q:
+            lim = self.fa_lim
+            if a_ref > lim:
+                a_ref = lim
+            elif a_ref < -lim:
+                a_ref = -lim
+            out += self.kfa_q*a_ref
+
+        out += self.integral
+        if out > lim_q:
+            out = lim_q
+        elif out < -lim_q:
+            out = -lim_q
+
+        if self.kiv_q:
+            e = error
+            lim = self.vi_lim
+            if e > lim:
+                e = lim
+            elif e < -lim:
+                e = -lim
+            step = self.kiv_q*e
+            # only integrate when it moves the output away from its limit
+            if not (out == lim_q and step > 0 or out == -lim_q and step < 0):
+                integral = self.integral + step
+                if integral > lim_q:
+                    integral = lim_q
+                elif integral < -lim_q:
+                    integral = -lim_q
+                self.integral = integral
+
+        # shift towards zero so small errors of either sign give zero duty
+        if out < 0:
+            return -(-out >> VEL_SHIFT)
+        return out >> VEL_SHIFT
+
+    def update(self, setpoint, measured, velocity, v_ref=0, a_ref=0):
+        """!
+        Runs one inner update, preceded by an outer update every outer_every
+        calls
+        @param setpoint Desired position in encoder ticks
+        @param measured Present position in encoder ticks
+        @param velocity Measured speed in ticks per second
+        @param v_ref Reference speed in ticks per second
+        @param a_ref Reference acceleration in ticks per second squared
+        @returns Duty cycle in whole percent
+        """
+        if self.count == 0:
+            self.outer(setpoint, measured, v_ref)
+        self.count += 1
+        if self.count >= self.outer_every:
+            self.count = 0
+        return self.inner(velocity, v_ref, a_ref)
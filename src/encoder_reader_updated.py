@@ -7,13 +7,34 @@
 
 import pyb
 import time
+from array import array
+
+## Samples kept in the history; a power of two so indexes wrap with a mask
+HISTORY = 8
+## Values stored per history sample: counter, ticks_us, position
+FIELDS = 3
+## Reads between the two samples a velocity is measured across
+VEL_WINDOW = 4
+## Velocity and acceleration pass a low-pass filter that moves 1/2**LP_SHIFT
+## of the way to each new estimate
+LP_SHIFT = 2
+
+
+def _rate(change, dt_us):
+    # change per second from a change over dt_us microseconds, in small-int
+    # math: 125000 = 1e6 >> 3, so the product stays below 2**30 for changes
+    # up to 8589; bigger changes are divided in milliseconds instead
+    if -8589 < change < 8589:
+        return change*125000//((dt_us >> 3) or 1)
+    return change*1000//((dt_us//1000) or 1)
+
 
 class Encoder:
     """!
     This class implements an encoder for the motor for an ME405 kit.
     """
 
-    def __init__(self, enA, enB, readch, enAch, enBch):
+    def __init__(self, enA, enB, readch, enAch, enBch, lazy=False):
         """!
         Initializes the encoder. Also sets up a 
         @param enA encoder channel A pin
@@ -21,8 +42,45 @@ class Encoder:
         @param timer timer used for both encoder pins
         @param enAch timer channel for encoder channel A
         @param enBch timer channel for encoder channel B
+        @param lazy True to leave the pins and timer alone until setup() is
+               called, which must happen before the first read()
         """
+        self.config = (enA, enB, readch, enAch, enBch)
+        self.reader = None
         
+        self.pos = 0
+        self.oldcounter = 0
+        
+        self.autoreload = 65536
+        # half the counter range, kept as an integer so read() needs no floats
+        self.half = self.autoreload >> 1
+        self.newcounter = 0
+        # moves bigger than this between reads come close to being mistaken
+        # for a wrap the other way
+        self.warn_delta = (self.half*3) >> 2
+        # the same limit for speed*interval, with speed/8 in ticks per second
+        # times interval/128 in us, which is about 977 per tick moved
+        self.warn_product = self.warn_delta*977
+
+        # the latest samples, FIELDS integers each, allocated once here
+        self.history = array('i', (0 for n in range(FIELDS*HISTORY)))
+        self.head = 0
+        self.samples = 0
+        ## Filtered velocity in ticks per second
+        self.velocity = 0
+        ## Filtered acceleration in ticks per second squared
+        self.acceleration = 0
+        self.ticks = time.ticks_us()
+        ## Samples whose change came close to the wrap limit
+        self.near_wraps = 0
+        if not lazy:
+            self.setup()
+
+    def setup(self):
+        """!
+        Sets up the encoder pins and the timer counting them, from zero
+        """
+        enA, enB, readch, enAch, enBch = self.config
         # sets up pin A and B of the encoder
         self.pinA = pyb.Pin(enA, pyb.Pin.OUT_PP)
         self.pinB = pyb.Pin(enB, pyb.Pin.OUT_PP)
@@ -31,20 +89,17 @@ class Encoder:
         self.reader = pyb.Timer(readch, period=65535, prescaler=0)
         self.chA = self.reader.channel(enAch, pyb.Timer.ENC_AB, pin=self.pinA)
         self.chB = self.reader.channel(enBch, pyb.Timer.ENC_AB, pin=self.pinB)
-        
-        self.pos = 0
-        self.oldcounter = 0
         self.reader.counter(0)
-        
-        self.autoreload = 65536
-        
-        print("Initializing Encoder")
+        self.oldcounter = 0
+        self.ticks = time.ticks_us()
 
     def read(self):
         """!
         reads the current encoder position
         and checks for overflow or underflow
-        when delta has exceeded positively or negatively half of the 65536 ticks
+        when delta has exceeded positively or negatively half of the 65536 ticks.
+        Integer math only, so it can run in an interrupt. Use sample()
+        instead where the velocity is needed.
         """
 
         # new encoder position = read encoder position
@@ -56,13 +111,12 @@ class Encoder:
         
         # check for overflow or underflow, correct delta if needed
         # underflow occurs if the delta is greater than half the encoder max
-        if delta >= 0.5*(self.autoreload):
+        if delta >= self.half:
             delta -= self.autoreload
         # overflow occurs if the delta is less than negative of half the encoder max
-        elif delta <= -0.5*(self.autoreload):
+        elif delta <= -self.half:
             delta += self.autoreload
 
-            
         # find new position using deltath
         self.pos += delta
 
@@ -70,11 +124,96 @@ class Encoder:
 #         print("Position = " + str(self.pos))
         return self.pos
 
+    def sample(self):
+        """!
+        Reads the position as read() does, and also stores the sample with
+        its ticks_us time in the history and updates velocity and
+        acceleration, all in integer math, so it can run in an interrupt.
+        Call it in place of read(), not as well, so every read is a sample.
+        @returns The position
+        """
+        pos = self.read()
+        now = time.ticks_us()
+        step = time.ticks_diff(now, self.ticks)
+        # a change this big, or a long wait at the speed seen so far, may
+        # already have been mistaken for a wrap the other way
+        if self.samples:
+            delta = pos - self.history[self.head*FIELDS + 2]
+            speed = self.velocity if self.velocity >= 0 else -self.velocity
+            if (delta > self.warn_delta or delta < -self.warn_delta
+                    or (speed >> 3)*(step >> 7) > self.warn_product):
+                self.near_wraps += 1
+
+        # store the sample, then estimate speed across the last VEL_WINDOW
+        # reads, which averages out the one tick steps at low speed
+        hist = self.history
+        head = (self.head + 1) & (HISTORY - 1)
+        self.head = head
+        i = head*FIELDS
+        hist[i] = self.newcounter
+        hist[i + 1] = now
+        hist[i + 2] = pos
+        self.samples += 1
+        if self.samples > VEL_WINDOW:
+            j = ((head - VEL_WINDOW) & (HISTORY - 1))*FIELDS
+            dt = time.ticks_diff(now, hist[j + 1])
+            if dt > 0:
+                vel = _rate(pos - hist[j + 2], dt)
+                vel = self.velocity + ((vel - self.velocity) >> LP_SHIFT)
+                if step > 0:
+                    acc = _rate(vel - self.velocity, step)
+                    self.acceleration += (acc - self.acceleration) >> LP_SHIFT
+                self.velocity = vel
+        self.ticks = now
+        return pos
+
     def zero(self):
         """!
         Resets position from the encoder back to 0
         """
         self.pos = 0
+        self.samples = 0
+        self.velocity = 0
+        self.acceleration = 0
+
+    def last(self, k=0):
+        """!
+        Returns an earlier sample from the history kept by sample()
+        @param k How many reads back, up to HISTORY - 1; 0 is the latest
+        @returns Tuple of timer counter, ticks_us time and position
+        """
+        i = ((self.head - k) & (HISTORY - 1))*FIELDS
+        return self.history[i], self.history[i + 1], self.history[i + 2]
+
+    def max_interval_us(self):
+        """!
+        Returns the longest time between reads that is safe at the present
+        speed: a longer one could let the counter move half its range, and
+        read() would take the move for a wrap the other way
+        """
+        speed = self.velocity if self.velocity >= 0 else -self.velocity
+        if speed == 0:
+            return 1 << 29
+        return self.half*1000//speed*1000
+
+    def check(self, interval_us=None):
+        """!
+        Warns if reads have come close to the wrap limit since the last check
+        @param interval_us Time between reads in microseconds, for an encoder
+               read with read() by a loop and sampled only now and then for
+               its speed; the reads are near the limit if this is over 3/4 of
+               max_interval_us(). None counts the samples that came near it.
+        @returns True if they have
+        """
+        near = self.near_wraps
+        self.near_wraps = 0
+        if interval_us is not None:
+            near = 1 if interval_us*4 > self.max_interval_us()*3 else 0
+        if near:
+            print(f"Encoder warning: {near} reads near the wrap limit; "
+                  f"read at least every {self.max_interval_us()} us")
+            return True
+        return False
 
 if __name__ == "__main__":
     enc1 = Encoder(pyb.Pin.board.PC6, pyb.Pin.board.PC7, 8, 1, 2)
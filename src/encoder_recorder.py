@@ -0,0 +1,88 @@
+"""! @file encoder_recorder.py
+Records the raw counter values an Encoder reads, each with the ticks_us
+time it was read at, so a run on the real motor can be replayed offline
+through Encoder and Servo (see sim/replay.py). The recorder sits between
+the encoder and its timer, and stores into an array allocated before the
+run so recording does not allocate memory.
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import time
+from array import array
+
+## Values stored per record: timer counter, ticks_us
+FIELDS = 2
+
+
+class EncoderRecorder:
+    """!
+    This class stands in for an encoder's timer and records every counter
+    value read through it
+    """
+
+    def __init__(self, encoder, capacity):
+        """!
+        Allocates the record buffer
+        @param encoder Encoder to record
+        @param capacity Largest number of reads one recording holds
+        """
+        self.encoder = encoder
+        self.timer = encoder.reader
+        self.capacity = capacity
+        self.data = array('i', (0 for n in range(FIELDS*capacity)))
+        self.count = 0
+        ## Reads made after the buffer was full
+        self.dropped = 0
+
+    def start(self):
+        """!
+        Starts a recording. The first record holds the counter value the
+        encoder last read, from which its position counts on from where it
+        is now; zero the encoder first for recordings that start at 0.
+        """
+        self.count = 0
+        self.dropped = 0
+        self.encoder.reader = self
+        self._add(self.encoder.oldcounter)
+
+    def stop(self):
+        """!
+        Ends the recording and gives the encoder its timer back
+        """
+        self.encoder.reader = self.timer
+
+    def _add(self, value):
+        n = self.count
+        if n == self.capacity:
+            self.dropped += 1
+            return
+        i = n*FIELDS
+        self.data[i] = value
+        self.data[i + 1] = time.ticks_us()
+        self.count = n + 1
+
+    def counter(self, value=None):
+        """!
+        Reads the timer counter and records it, as Timer.counter() does
+        @param value New counter value, or None to read
+        """
+        if value is not None:
+            return self.timer.counter(value)
+        value = self.timer.counter()
+        self._add(value)
+        return value
+
+    def records(self):
+        """!
+        Returns a memoryview of the stored records, FIELDS integers each
+        """
+        return memoryview(self.data)[:self.count*FIELDS]
+
+    def dump_frames(self, writer):
+        """!
+        Sends the recording as binary telemetry frames
+        @param writer TelemetryWriter set up for FIELDS fields per record
+        """
+        writer.add_block(self.records())
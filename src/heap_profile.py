@@ -0,0 +1,118 @@
+"""! @file heap_profile.py
+Finds which task allocates heap memory and how long garbage collection
+pauses take. Every task run is bracketed by gc.mem_alloc() readings: the
+difference is the bytes the run allocated, unless it dropped, which means
+the heap filled up during the run and a collection ran inside it. That
+run's time beyond the task's mean is taken as the pause. Collections can
+also be moved into idle time, where a pause cannot delay a control update,
+by collecting whenever enough has been allocated and the time until the
+next task is longer than the slowest collection so far.
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import gc
+import time
+from loop_timing import TimingStats
+
+
+class HeapStats:
+    """!
+    This class collects the heap use of one task's runs
+    """
+
+    def __init__(self, name, bucket_us=500):
+        """!
+        Creates empty statistics
+        @param name Task name, without spaces
+        @param bucket_us Width of one pause histogram bucket in microseconds
+        """
+        self.name = name
+        ## Runs measured, runs that allocated, and their total and largest
+        ## allocation in bytes
+        self.runs = 0
+        self.allocating = 0
+        self.total = 0
+        self.worst = 0
+        ## Collections that ran inside a run of this task
+        self.pauses = TimingStats(name + '.gc', bucket_us)
+
+    def add(self, before, after, took, typical):
+        """!
+        Records one run
+        @param before gc.mem_alloc() before the run
+        @param after gc.mem_alloc() after the run
+        @param took Run time in microseconds
+        @param typical Usual run time of the task in microseconds
+        """
+        self.runs += 1
+        if after < before:
+            pause = took - typical
+            self.pauses.add(pause if pause > 0 else 0)
+        elif after > before:
+            used = after - before
+            self.allocating += 1
+            self.total += used
+            if used > self.worst:
+                self.worst = used
+
+    def __str__(self):
+        mean = self.total//self.runs if self.runs else 0
+        return (f"{self.name:<16}{self.runs:>8}{self.allocating:>8}{mean:>8}"
+                f"{self.worst:>8}{self.pauses.count:>6}{self.pauses.worst_us:>8}")
+
+
+class IdleCollector:
+    """!
+    This class runs gc.collect() in idle time once enough has been allocated
+    """
+
+    def __init__(self, min_bytes=8192, bucket_us=500):
+        """!
+        Collects once, to measure how long a collection takes
+        @param min_bytes Bytes allocated since the last collection before
+               another one is worth running
+        @param bucket_us Width of one histogram bucket in microseconds
+        """
+        self.min_bytes = min_bytes
+        self.stats = TimingStats('idle.gc', bucket_us)
+        ## Longest collection so far; slack shorter than this is not used
+        self.cost_us = 0
+        self.live = 0
+        self.collect()
+
+    def collect(self):
+        """!
+        Runs a collection and times it
+        """
+        start = time.ticks_us()
+        gc.collect()
+        took = time.ticks_diff(time.ticks_us(), start)
+        self.stats.add(took)
+        if took > self.cost_us:
+            self.cost_us = took
+        self.live = gc.mem_alloc()
+
+    def idle(self, slack_us):
+        """!
+        Collects if enough has been allocated and there is time for it
+        @param slack_us Time until the next task is due
+        @returns True if it collected
+        """
+        if slack_us > self.cost_us and gc.mem_alloc() - self.live >= self.min_bytes:
+            self.collect()
+            return True
+        return False
+
+
+def table(stats):
+    """!
+    Returns a table of the heap use of several tasks
+    @param stats Sequence of HeapStats
+    """
+    lines = [f"{'Heap':<16}{'Runs':>8}{'Alloc':>8}{'Mean B':>8}{'Worst B':>8}"
+             f"{'GCs':>6}{'GC us':>8}"]
+    lines.extend(str(heap) for heap in stats)
+    lines.append(f"free {gc.mem_free()} B, allocated {gc.mem_alloc()} B")
+    return '\n'.join(lines)
@@ -0,0 +1,216 @@
+"""! @file loop_timing.py
+Measures how long control code takes and how late each control period
+starts, using time.ticks_us. Results go into buffers allocated up front: a
+count, a total, the worst case and a histogram with fixed width buckets.
+show_all() prints every timer, like task_share.show_all() does for shares,
+and fetch_timing.py on the PC reads and summarises that printout.
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import time
+from array import array
+
+## Every TimingStats created, in order, for show_all()
+all_stats = []
+## Every LoopTimer created, in order, for show_all()
+all_loops = []
+
+
+class TimingStats:
+    """!
+    This class collects durations in microseconds
+    """
+
+    def __init__(self, name, bucket_us=100, buckets=16):
+        """!
+        Creates empty statistics and registers them for show_all()
+        @param name Name printed with the results, without spaces
+        @param bucket_us Width of one histogram bucket in microseconds
+        @param buckets Number of buckets; the last one also counts longer times
+        """
+        self.name = name
+        self.bucket_us = bucket_us
+        self.hist = array('I', (0 for n in range(buckets)))
+        self.reset()
+        all_stats.append(self)
+
+    def reset(self):
+        for n in range(len(self.hist)):
+            self.hist[n] = 0
+        self.count = 0
+        self.total_us = 0
+        self.worst_us = 0
+
+    def add(self, us):
+        """!
+        Records one duration
+        @param us Duration in microseconds
+        """
+        self.count += 1
+        self.total_us += us
+        if us > self.worst_us:
+            self.worst_us = us
+        n = us//self.bucket_us
+        last = len(self.hist) - 1
+        self.hist[n if n < last else last] += 1
+
+    def __str__(self):
+        mean = self.total_us//self.count if self.count else 0
+        return (f"{self.name}: n={self.count} mean={mean}us worst={self.worst_us}us "
+                f"| {self.bucket_us}us buckets {','.join(str(n) for n in self.hist)}")
+
+
+class LoopTimer:
+    """!
+    This class times each run of a periodic control step: how long it takes
+    and how far after its intended start time it began
+    """
+
+    def __init__(self, name, period_us, bucket_us=None, buckets=16):
+        """!
+        Creates the timer
+        @param name Name printed with the results, without spaces
+        @param period_us Intended time between runs in microseconds
+        @param bucket_us Histogram bucket width; period_us/buckets if None
+        @param buckets Number of histogram buckets
+        """
+        if bucket_us is None:
+            bucket_us = max(period_us//buckets, 1)
+        self.period_us = period_us
+        self.exec = TimingStats(name + '.exec', bucket_us, buckets)
+        self.late = TimingStats(name + '.late', bucket_us, buckets)
+        ## Runs that started more than a whole period late
+        self.late_starts = 0
+        self.next_us = None
+        self.name = name
+        all_loops.append(self)
+
+    def begin(self):
+        """!
+        Marks the start of a run
+        @returns Start time to pass to end()
+        """
+        now = time.ticks_us()
+        if self.next_us is None:
+            self.next_us = now
+        late = time.ticks_diff(now, self.next_us)
+        if late < 0:
+            late = 0
+        self.late.add(late)
+        if late >= self.period_us:
+            # a period was skipped; measure from this run on
+            self.late_starts += 1
+            self.next_us = time.ticks_add(now, self.period_us)
+        else:
+            self.next_us = time.ticks_add(self.next_us, self.period_us)
+        return now
+
+    def end(self, start):
+        """!
+        Marks the end of a run
+        @param start Value begin() returned
+        """
+        self.exec.add(time.ticks_diff(time.ticks_us(), start))
+
+    def counters(self):
+        """!
+        Returns the counters show_all() prints, as (name, value) pairs
+        """
+        return (('late_starts', self.late_starts),)
+
+
+class BootTimer:
+    """!
+    This class times the phases of start-up, from reset to the first
+    control period
+    """
+
+    def __init__(self, start_us):
+        """!
+        @param start_us ticks_us() when the main program started; the ticks
+               count from reset, so this is also the time reset took
+        """
+        self.start_us = start_us
+        self.last_us = start_us
+        self.phases = []
+
+    def mark(self, name):
+        """!
+        Ends a phase that started when the previous one ended
+        @param name Name printed with the result, without spaces
+        """
+        now = time.ticks_us()
+        self.phases.append((name, time.ticks_diff(now, self.last_us)))
+        self.last_us = now
+
+    def __str__(self):
+        # the last phase ends when the first control period can start
+        return (f"boot: reset={self.start_us}us "
+                + ' '.join(f"{name}={us}us" for name, us in self.phases)
+                + f" ready={self.last_us}us after reset")
+
+
+def timed_task(task_fun, timer):
+    """!
+    Wraps a task generator function so that every run is timed
+    @param task_fun Generator function, such as one given to scheduler.Task
+    @param timer LoopTimer for the task
+    @returns Generator function to give to scheduler.Task instead
+    """
+    def run():
+        gen = task_fun()
+        while True:
+            start = timer.begin()
+            state = next(gen)
+            timer.end(start)
+            yield state
+    return run
+
+
+def instrument(obj, name, stats, args=0):
+    """!
+    Replaces a method of one object with a version that times every call.
+    The wrapper takes exactly args positional arguments, so calls build no
+    argument tuple and allocate nothing; it is made once, here.
+    @param obj Object whose method to time, such as an Encoder
+    @param name Method name, such as 'read'
+    @param stats TimingStats receiving the call durations
+    @param args Number of arguments the calls pass, 0 to 2
+    """
+    fun = getattr(obj, name)
+    ticks_us = time.ticks_us
+    ticks_diff = time.ticks_diff
+    add = stats.add
+    if args == 0:
+        def timed():
+            start = ticks_us()
+            result = fun()
+            add(ticks_diff(ticks_us(), start))
+            return result
+    elif args == 1:
+        def timed(a):
+            start = ticks_us()
+            result = fun(a)
+            add(ticks_diff(ticks_us(), start))
+            return result
+    elif args == 2:
+        def timed(a, b):
+            start = ticks_us()
+            result = fun(a, b)
+            add(ticks_diff(ticks_us(), start))
+            return result
+    else:
+        raise ValueError('instrument() times calls of up to 2 arguments')
+    setattr(obj, name, timed)
+
+
+def show_all():
+    """!
+    Returns one line of results per timer
+    """
+    lines = [str(stats) for stats in all_stats]
+    lines.extend(f"{loop.name}.{counter}: {value}" for loop in all_loops
+                 for counter, value in loop.counters())
+    return '\n'.join(lines)
@@ -1,94 +1,133 @@
 """! @file main.py
-Runs two motors simultaneously.
+Runs two motors simultaneously from one task.
 @author Nathaniel Davis and Sebastian Bessoudo
 @date   3-1-2024
 """
 
-import gc
-import pyb
-import cotask
-import task_share
 import time
-from motor_driver_updated import MotorDriver
-from encoder_reader_updated import Encoder
-from servo_updated import Servo
-
-
-def task1_fun():
-    """!
-    This task runs the first motor. It moves the motor to a positive setpoint.
-    """
-    # set up MotorDriver class object
-    moe1 = MotorDriver(pyb.Pin.board.PA10, pyb.Pin.board.PB4, 1,  pyb.Pin.board.PB5, 2, 3)
-    # set up Encoder class object
-    enc1 = Encoder(pyb.Pin.board.PC6, pyb.Pin.board.PC7, 8, 1, 2)
-    # set up Servo class object using the MotorDriver and Encoder objects specified
-    serv1 = Servo(moe1, enc1)
-    # run ad infinitum
-    while True:
-        # Kp
-        input_kp = 0.05
-        serv1.set_Kp(input_kp)
-        # setpoint
-        input_setp = 100000
-        serv1.set_setpoint(input_setp)
-        
-        # repeatedly checks setpoint every time task is queued 
-        while True:
-            serv1.set_setpoint(input_setp)
-            yield 
-
-
-def task2_fun():
-    """!
-    This task runs the second motor.It moves the motor to a negative setpoint.
-    """
-    # set up MotorDriver class object
-    moe2 = MotorDriver(pyb.Pin.board.PC1, pyb.Pin.board.PA0, 1,  pyb.Pin.board.PA1, 2, 5)
-    # set up Encoder class object
-    enc2 = Encoder(pyb.Pin.board.PB6, pyb.Pin.board.PB7, 4, 1, 2)
-    # set up Servo class object using the MotorDriver and Encoder objects specified
-    serv2 = Servo(moe2, enc2)
-    # run ad infinitum
-    while True:
-        # Kp
-        input_kp = 0.05
-        serv2.set_Kp(input_kp)
-        # setpoint
-        input_setp = -150000
-        serv2.set_setpoint(input_setp)
-        
-        # repeatedly checks setpoint every time task is queued
-        while True:
-            serv2.set_setpoint(input_setp)
-            yield 
+# pyb comes first: on the PC, the simulated pyb is what gives time its
+# MicroPython ticks functions and board code the simulated gc
+import pyb
+## ticks_us() when this program started, counted from reset
+BOOT_US = time.ticks_us()
+
+import gc
+from multi_axis import MultiAxis
+from motion_profile import synchronized
+import loop_timing
+import auto_tune
+from scheduler import Scheduler, Task
+
+
+## One row per motor: MotorDriver and Encoder arguments, with pins by name,
+## gain and the position to move to. Another motor only needs another row.
+AXES = (
+    # first motor moves to a positive setpoint
+    dict(motor=('PA10', 'PB4', 1, 'PB5', 2, 3),
+         encoder=('PC6', 'PC7', 8, 1, 2),
+         kp=0.05, target=100000),
+    # second motor moves to a negative setpoint
+    dict(motor=('PC1', 'PA0', 1, 'PA1', 2, 5),
+         encoder=('PB6', 'PB7', 4, 1, 2),
+         kp=0.05, target=-150000),
+)
+
+## Control period in milliseconds, unless auto_tune saved another
+PERIOD_MS = 30
+
+## Speed, acceleration and jerk limits of the moves, in ticks and seconds
+V_MAX = 80000
+A_MAX = 200000
+J_MAX = 2000000
+
+## Period of the encoder health check in ms, and the longest the scheduler
+## may stretch it to when the CPU is overloaded
+CHECK_MS = 200
+CHECK_MAX_MS = 1000
+
+## True to time every control update, encoder read and duty cycle write;
+## off by default, since the timing adds to every call
+INSTRUMENT = False
+
+## True to record the heap allocations of every task run and the garbage
+## collections that land inside them
+PROFILE_HEAP = False
+## Bytes allocated after which gc.collect() runs in idle time instead of
+## inside a task, such as 8192, or None to leave collections to MicroPython
+IDLE_GC_BYTES = None
+
 
 if __name__ == "__main__":
+    boot = loop_timing.BootTimer(BOOT_US)
+    boot.mark('import')
     print("Press Ctrl-C to stop and show diagnostics.")
     
-    # Create the tasks. If trace is enabled for any task, memory will be
-    # allocated for state transition tracing, and the application will run out
-    # of memory after a while and quit. Therefore, use tracing only for 
-    # debugging and set trace to False when it's not needed
-    task1 = cotask.Task(task1_fun, name="Motor 1", priority=1, period=30, profile=True, trace=False)
-    task2 = cotask.Task(task2_fun, name="Motor 2", priority=2, period=30, profile=True, trace=False)
-    cotask.task_list.append(task1)
-    cotask.task_list.append(task2)
+    # use the gain and period found by auto_tune.py, if it was run
+    period = PERIOD_MS
+    tuning = auto_tune.load()
+    if tuning is not None:
+        period = tuning['period_ms']
+        for axis in AXES:
+            axis['kp'] = tuning['kp']
+    # the pins and timers are set up after the collection below
+    axes = MultiAxis(AXES, period_ms=period, lazy=True)
+    # precompute S-curve moves that start and finish together
+    moves = synchronized([(0, axis['target']) for axis in AXES],
+                         V_MAX, A_MAX, period, J_MAX)
+    for i in range(len(AXES)):
+        axes.move(i, moves[i])
+    if INSTRUMENT:
+        # the update of all axes stands in for Servo.set_setpoint here
+        loop_timing.instrument(axes, 'update',
+                               loop_timing.TimingStats('MultiAxis.update', bucket_us=50))
+        read_stats = loop_timing.TimingStats('Encoder.read', bucket_us=10)
+        for enc in axes.encoders:
+            loop_timing.instrument(enc, 'read', read_stats)
+        duty_stats = loop_timing.TimingStats('set_duty_cycle', bucket_us=10)
+        for motor in axes.motors:
+            loop_timing.instrument(motor, 'set_duty_cycle', duty_stats, 1)
+
+    def check_fun():
+        # warns if the control period is too long for the motor speed,
+        # sampling each encoder here for its speed so the control reads stay
+        # plain reads
+        while True:
+            for enc in axes.encoders:
+                enc.sample()
+                enc.check(axes.period_ms*1000)
+            yield
+
+    boot.mark('config')
 
     # Run the memory garbage collector to ensure memory is as defragmented as
-    # possible before the real-time scheduler is started
-    gc.collect()
-
-    # Run the scheduler with the chosen scheduling algorithm. Quit if ^C pressed
-    while True:
-        try:
-            cotask.task_list.pri_sched()
-        except KeyboardInterrupt:
-            break
-
-    # Print a table of task data and a table of shared information data
-    print('\n' + str (cotask.task_list))
-    print(task_share.show_all())
-    print(task1.get_trace())
+    # possible before the real-time scheduler is started; the idle collector
+    # does this itself, to time a collection
+    scheduler = Scheduler(heap=PROFILE_HEAP, idle_gc_bytes=IDLE_GC_BYTES)
+    if scheduler.collector is None:
+        gc.collect()
+    boot.mark('gc.collect')
+
+    # set up the hardware, which also turns the motors off, before the first
+    # control period, so its time is not counted as a task run
+    axes.setup()
+    boot.mark('setup')
+
+    # the motors come first; the check may slow down under load
+    scheduler.append(Task(axes.task, name="Motors", priority=2, period=period))
+    scheduler.append(Task(check_fun, name="Check", priority=1, period=CHECK_MS,
+                          max_period=CHECK_MAX_MS))
+
+    # Run the scheduler until ^C is pressed
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        pass
+
+    axes.stop()
+
+    # Print a table of task data, heap use, the timing histograms and how
+    # long start-up took
+    print('\n' + str(scheduler))
+    print(loop_timing.show_all())
+    print(boot)
     print('')
-ç
\ No newline at end of file
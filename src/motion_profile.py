@@ -0,0 +1,147 @@
+"""! @file motion_profile.py
+Precomputed position profiles for the servo axes. Instead of stepping the
+setpoint straight to the target, a move is computed once, before it starts,
+as a table holding the setpoint for every control period; trapezoidal
+profiles limit speed and acceleration and S-curves also limit jerk. The
+control task then only looks up the next table entry each period.
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import math
+from array import array
+
+
+def _check_limits(v_max, a_max, j_max=None):
+    # every profile divides by its limits
+    if not v_max > 0:
+        raise ValueError(f"v_max must be positive, not {v_max}")
+    if not a_max > 0:
+        raise ValueError(f"a_max must be positive, not {a_max}")
+    if j_max is not None and not j_max > 0:
+        raise ValueError(f"j_max must be positive, not {j_max}")
+
+
+def _trapezoid_fn(distance, v_max, a_max):
+    # returns position as a function of time for a move starting at 0, and
+    # the move duration; a short move never reaches v_max (triangle profile)
+    d = abs(distance)
+    sign = -1 if distance < 0 else 1
+    if v_max*v_max/a_max > d:
+        v_max = math.sqrt(d*a_max)
+    t_acc = v_max/a_max
+    # a move of length zero has no cruise either
+    t_cruise = (d - v_max*t_acc)/v_max if v_max else 0
+    total = 2*t_acc + t_cruise
+
+    def position(t):
+        if t <= 0:
+            return 0
+        if t < t_acc:
+            return sign*0.5*a_max*t*t
+        if t < t_acc + t_cruise:
+            return sign*(0.5*v_max*t_acc + v_max*(t - t_acc))
+        if t < total:
+            left = total - t
+            return sign*(d - 0.5*a_max*left*left)
+        return distance
+    return position, total
+
+
+def _table(start, position, duration, span, period_ms):
+    # samples position(t*duration/span) every period up to span seconds,
+    # which stretches a move of the given duration to last span seconds
+    dt = period_ms/1000
+    n = int(math.ceil(span/dt)) + 1
+    scale = duration/span if span else 0
+    return array('i', (start + int(round(position(k*dt*scale))) for k in range(n)))
+
+
+def _smooth(table, period_ms, a_max, j_max):
+    # a moving average over a_max/j_max seconds turns the corners of the
+    # acceleration into ramps, limiting jerk to about j_max
+    m = max(int(round(a_max/j_max/(period_ms/1000))), 1)
+    if m == 1:
+        return table
+    end = table[-1]
+    padded = list(table) + [end]*(m - 1)
+    out = array('i', (0 for k in range(len(padded))))
+    total = table[0]*m
+    for k in range(len(padded)):
+        total += padded[k] - (padded[k - m] if k >= m else table[0])
+        out[k] = int(round(total/m))
+    return out
+
+
+def trapezoid(start, end, v_max, a_max, period_ms):
+    """!
+    Computes a move with limited speed and acceleration
+    @param start Starting position in encoder ticks
+    @param end Final position in encoder ticks
+    @param v_max Largest speed in ticks per second
+    @param a_max Largest acceleration in ticks per second squared
+    @param period_ms Control period in milliseconds
+    @returns array('i') with the setpoint for each control period
+    """
+    _check_limits(v_max, a_max)
+    position, duration = _trapezoid_fn(end - start, v_max, a_max)
+    return _table(start, position, duration, duration, period_ms)
+
+
+def s_curve(start, end, v_max, a_max, j_max, period_ms):
+    """!
+    Computes a move with limited speed, acceleration and jerk
+    @param start Starting position in encoder ticks
+    @param end Final position in encoder ticks
+    @param v_max Largest speed in ticks per second
+    @param a_max Largest acceleration in ticks per second squared
+    @param j_max Largest jerk in ticks per second cubed
+    @param period_ms Control period in milliseconds
+    @returns array('i') with the setpoint for each control period
+    """
+    _check_limits(v_max, a_max, j_max)
+    return _smooth(trapezoid(start, end, v_max, a_max, period_ms),
+                   period_ms, a_max, j_max)
+
+
+def synchronized(moves, v_max, a_max, period_ms, j_max=None):
+    """!
+    Computes moves for several axes that start and finish together. The
+    longest move runs at the limits; the others are slowed down to match it.
+    @param moves Sequence of (start, end) pairs, one per axis
+    @param v_max Largest speed in ticks per second
+    @param a_max Largest acceleration in ticks per second squared
+    @param period_ms Control period in milliseconds
+    @param j_max Largest jerk for S-curves, or None for trapezoids
+    @returns List of array('i') tables, all the same length
+    """
+    _check_limits(v_max, a_max, j_max)
+    shapes = [_trapezoid_fn(end - start, v_max, a_max) for start, end in moves]
+    span = max(duration for position, duration in shapes) if shapes else 0
+    tables = [_table(start, position, duration, span, period_ms)
+              for (start, end), (position, duration) in zip(moves, shapes)]
+    if j_max is not None:
+        tables = [_smooth(table, period_ms, a_max, j_max) for table in tables]
+    return tables
+
+
+def derivatives(table, period_ms):
+    """!
+    Computes the reference speed and acceleration of a table, for the
+    feedforward of a cascade controller. Like the table, they are computed
+    once before the move, so following it stays a lookup.
+    @param table array('i') of setpoints, one per control period
+    @param period_ms Control period of the table in milliseconds
+    @returns Tuple of array('i') speeds in ticks per second and array('i')
+             accelerations in ticks per second squared, as long as the table
+    """
+    rate = 1000/period_ms
+    n = len(table)
+    # central differences, so the speed is not half a period late
+    vel = array('i', (int(round((table[min(k + 1, n - 1)] - table[max(k - 1, 0)])*rate/2))
+                      for k in range(n)))
+    acc = array('i', (int(round((table[min(k + 1, n - 1)] - 2*table[k]
+                                 + table[max(k - 1, 0)])*rate*rate)) for k in range(n)))
+    return vel, acc
+
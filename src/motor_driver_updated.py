@@ -7,24 +7,48 @@ MotorDriver class to be used.
 """
 
 import pyb
-import time
 
 class MotorDriver:
     """!
     This class implements a motor driver for an ME405 kit.
+    It remembers what it last wrote to the pins and timer so that setting
+    the same duty cycle again costs no hardware writes.
     """
+    ## At zero duty, disable the driver and let the motor spin down freely
+    COAST = 0
+    ## At zero duty, keep the driver on with both inputs low to short the motor
+    BRAKE = 1
 
-    def __init__(self, en_pin, in1pin, pin1ch, in2pin, pin2ch, timer):
+    def __init__(self, en_pin, in1pin, pin1ch, in2pin, pin2ch, timer,
+                 deadband=0, mode=COAST, lazy=False):
         """!
         Creates a motor driver by initializing GPIO
-        pins and turning off the motor for safety.
+        pins and turning off the motor for safety. With lazy set, that
+        happens in setup() instead.
         @param en_pin 
         @param in1pin Pin for use in positive direction
         @param pin1ch Channel for pin 1
         @param in2pin Pin for use in negative direction
         @param pin2ch Channel for pin 2
         @param timer Timer channel used
+        @param deadband Duty cycles smaller than this, in percent, count as zero
+        @param mode What zero duty does, MotorDriver.COAST or MotorDriver.BRAKE
+        @param lazy True to leave the pins and timer alone until setup() is
+               called, which must happen before the first set_duty_cycle()
         """
+        self.config = (en_pin, in1pin, pin1ch, in2pin, pin2ch, timer)
+        self.deadband = deadband
+        self.mode = mode
+        self.PWM = 0
+        self.top = None
+        if not lazy:
+            self.setup()
+
+    def setup(self):
+        """!
+        Initializes the GPIO pins and PWM timer and turns off the motor
+        """
+        en_pin, in1pin, pin1ch, in2pin, pin2ch, timer = self.config
         self.pinENA = pyb.Pin(en_pin, pyb.Pin.OUT_PP)
         self.pinIN1 = pyb.Pin(in1pin, pyb.Pin.OUT_PP)
         self.pinIN2 = pyb.Pin(in2pin, pyb.Pin.OUT_PP)
@@ -32,9 +56,17 @@ class MotorDriver:
         self.chIN1 = tim.channel(pin1ch, pyb.Timer.PWM, pin=self.pinIN1)
         self.chIN2 = tim.channel(pin2ch, pyb.Timer.PWM, pin=self.pinIN2)
         self.pinENA.low()
+        # compare value for 100 percent duty
+        self.top = tim.period() + 1
+        
+        # what the hardware holds now: enable level, both compare values and
+        # the signed compare value of the last duty cycle, None until the
+        # first call so that it applies the mode's stop outputs too
+        self.en = 0
+        self.cmp1 = None
+        self.cmp2 = None
+        self.state = None
         
-        print("Creating a Motor Driver")
-        self.PWM = 0
     def set_duty_cycle(self, level):
         """!
         This method sets the duty cycle to be sent
@@ -44,21 +76,59 @@ class MotorDriver:
         @param level A signed integer holding the duty
                cycle of the voltage sent to the motor
         """
-#         print(f"Setting duty cycle to {level}")
         self.PWM = level
-        if self.PWM > 0:
+        if level > 100:
+            level = 100
+        elif level < -100:
+            level = -100
+        if -self.deadband < level < self.deadband:
+            level = 0
+        # quantise to the timer resolution, keeping the sign for direction
+        if level < 0:
+            state = -(int(-level*self.top)//100)
+        else:
+            state = int(level*self.top)//100
+        if state == self.state:
+            return
+        self.state = state
+
+        if state > 0:
 #             print("Forward Motion")
-            self.pinENA.high()
-            self.chIN1.pulse_width_percent(self.PWM)
-            self.chIN2.pulse_width_percent(0)
-        elif self.PWM == 0:
-#             print("Stopping Motion")
-            self.pinENA.low()
-        elif self.PWM < 0:
+            self._write(state, 0, 1)
+        elif state < 0:
 #             print("Backward Motion")
-            self.pinENA.high()
-            self.chIN2.pulse_width_percent(abs(self.PWM))
-            self.chIN1.pulse_width_percent(0)
+            self._write(0, -state, 1)
+        elif self.mode == MotorDriver.BRAKE:
+#             print("Braking")
+            self._write(0, 0, 1)
+        else:
+#             print("Stopping Motion")
+            self._write(self.cmp1, self.cmp2, 0)
+
+    def _write(self, cmp1, cmp2, en):
+        # only touch what changed; set the inputs before enabling the bridge
+        if cmp1 != self.cmp1:
+            self.chIN1.pulse_width(cmp1)
+            self.cmp1 = cmp1
+        if cmp2 != self.cmp2:
+            self.chIN2.pulse_width(cmp2)
+            self.cmp2 = cmp2
+        if en != self.en:
+            self.pinENA.value(en)
+            self.en = en
+
+    def set_mode(self, mode, deadband=None):
+        """!
+        Chooses what a zero duty cycle does, and optionally the deadband
+        @param mode MotorDriver.COAST or MotorDriver.BRAKE
+        @param deadband Duty cycles smaller than this, in percent, count as zero
+        """
+        self.mode = mode
+        if deadband is not None:
+            self.deadband = deadband
+        # apply the new mode on the next call even if the duty is unchanged
+        self.state = None
+
     def print(self):
         print(self.PWM)
 if __name__ == "__main__":
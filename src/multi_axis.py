@@ -0,0 +1,170 @@
+"""! @file multi_axis.py
+Runs the position loops of any number of motors from one task. Each axis
+is one row of a configuration table; its state lives in parallel integer
+arrays and every axis is updated in a single pass, with all the encoders
+read back to back first so the samples are taken close together. Each axis
+has its own Encoder and fixed point PIDController, the same classes Servo
+uses.
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+from array import array
+from motor_driver_updated import MotorDriver
+from encoder_reader_updated import Encoder
+from pid_controller import PIDController
+
+
+def _zeros(n):
+    return array('i', (0 for i in range(n)))
+
+
+class MultiAxis:
+    """!
+    This class drives several servo axes. An axis is described by a dict:
+        motor     arguments for MotorDriver, (en_pin, in1pin, pin1ch, in2pin, pin2ch, timer);
+                  pins may be given by name, such as 'PA10'
+        encoder   arguments for Encoder, (enA, enB, readch, enAch, enBch)
+        kp        proportional gain, percent duty per tick (default 0.1)
+        ki, kd    optional integral and derivative gains (default 0)
+        setpoint  starting setpoint in ticks (default 0)
+    Other keys, such as the target of a move, are left for the caller.
+    """
+
+    def __init__(self, axes, period_ms=30, lazy=False):
+        """!
+        Sets up the motors and encoders of every axis
+        @param axes Sequence of axis configuration dicts
+        @param period_ms Time between update() calls, which scales the
+               integral and derivative gains
+        @param lazy True to leave the pins and timers alone until setup() is
+               called, which must happen before the first update()
+        """
+        n = len(axes)
+        self.count = n
+        self.period_ms = period_ms
+        self.motors = [MotorDriver(*axis['motor'], lazy=lazy) for axis in axes]
+        self.encoders = [Encoder(*axis['encoder'], lazy=lazy) for axis in axes]
+        self.controllers = [PIDController(axis.get('kp', 0.1), axis.get('ki', 0.0),
+                                          axis.get('kd', 0.0), period_ms=period_ms)
+                            for axis in axes]
+        self.ready = False
+
+        # per-axis state, indexed by axis number
+        self.setpoint = _zeros(n)
+        self.error = _zeros(n)
+        self.duty = _zeros(n)
+        # motion profile tables being followed, and the entry reached
+        self.profiles = [None]*n
+        self.step = _zeros(n)
+        for i in range(n):
+            self.setpoint[i] = axes[i].get('setpoint', 0)
+        if not lazy:
+            self.setup()
+
+    def setup(self):
+        """!
+        Sets up the pins and timers of every motor and encoder, turning the
+        motors off. With lazy set, call this once before the first update().
+        """
+        for motor in self.motors:
+            motor.setup()
+        for enc in self.encoders:
+            enc.setup()
+        self.ready = True
+
+    def set_setpoint(self, axis, setpoint):
+        """!
+        Changes the setpoint of one axis, ending any profile it follows
+        @param axis Axis number
+        @param setpoint Position for the motor to travel to
+        """
+        self.profiles[axis] = None
+        self.setpoint[axis] = setpoint
+
+    def move(self, axis, table):
+        """!
+        Makes one axis follow a precomputed motion profile, taking the next
+        table entry as its setpoint every update, then holding the last one
+        @param axis Axis number
+        @param table array('i') of setpoints from motion_profile
+        """
+        self.step[axis] = 0
+        self.profiles[axis] = table
+
+    def moving(self):
+        """!
+        Returns True while any axis is still following its profile
+        """
+        for i in range(self.count):
+            table = self.profiles[i]
+            if table is not None and self.step[i] < len(table) - 1:
+                return True
+        return False
+
+    def set_Kp(self, axis, Kp):
+        """!
+        Changes the proportional gain of one axis
+        @param axis Axis number
+        @param Kp Gain in percent duty per encoder tick
+        """
+        self.controllers[axis].set_gains(kp=Kp)
+
+    def set_period(self, period_ms):
+        """!
+        Changes the time between update() calls, which the controllers'
+        integral and derivative gains are scaled by
+        @param period_ms Control period in milliseconds
+        """
+        self.period_ms = period_ms
+        for ctrl in self.controllers:
+            ctrl.set_gains(period_ms=period_ms)
+
+    def zero(self, axis):
+        """!
+        Resets the position of one axis back to 0
+        """
+        self.encoders[axis].zero()
+
+    def update(self):
+        """!
+        Runs one control period of every axis
+        """
+        n = self.count
+        encoders = self.encoders
+        # sample every encoder first so the positions belong to one instant
+        for i in range(n):
+            encoders[i].read()
+
+        for i in range(n):
+            table = self.profiles[i]
+            if table is not None:
+                k = self.step[i]
+                self.setpoint[i] = table[k]
+                if k < len(table) - 1:
+                    self.step[i] = k + 1
+
+            position = encoders[i].pos
+            self.error[i] = self.setpoint[i] - position
+            level = self.controllers[i].update(self.setpoint[i], position)
+            self.duty[i] = level
+            self.motors[i].set_duty_cycle(level)
+
+    def stop(self):
+        """!
+        Sets every motor's duty cycle to zero
+        """
+        if not self.ready:
+            return
+        for i in range(self.count):
+            self.duty[i] = 0
+            self.motors[i].set_duty_cycle(0)
+
+    def task(self):
+        """!
+        Generator for a scheduler.Task that updates every axis each time it runs
+        """
+        while True:
+            self.update()
+            yield
@@ -0,0 +1,137 @@
+"""! @file pid_controller.py
+Fixed point PID controller for the Servo class. All arithmetic is on small
+integers, so an update allocates no memory and can run in a timer interrupt.
+The output is clamped to the duty cycle range, the integral stops growing
+while the output is saturated (anti-windup), and the derivative acts on the
+measured position rather than the error, so setpoint steps do not kick.
+With ki = kd = 0 it is the plain proportional controller, clamped.
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import pyb
+
+## Fraction bits of the fixed point gains
+SHIFT = 16
+
+
+class PIDController:
+    """!
+    This class computes a motor duty cycle from a setpoint and a measured
+    position once per control period
+    """
+
+    def __init__(self, kp, ki=0.0, kd=0.0, period_ms=10, limit=100):
+        """!
+        Creates a controller with no history
+        @param kp Proportional gain in percent duty per encoder tick
+        @param ki Integral gain in percent duty per tick per second
+        @param kd Derivative gain in percent duty per tick per second of speed
+        @param period_ms Time between updates in milliseconds
+        @param limit Largest duty cycle magnitude in percent
+        """
+        self.integral = 0
+        self.last = None
+        self.period_ms = period_ms
+        self.set_gains(kp, ki, kd, limit=limit)
+
+    def set_gains(self, kp=None, ki=None, kd=None, period_ms=None, limit=None):
+        """!
+        Changes any of the gains, the period or the output limit. Safe to call
+        while update() runs in an interrupt.
+        """
+        if kp is not None:
+            self.kp = kp
+        if ki is not None:
+            self.ki = ki
+        if kd is not None:
+            self.kd = kd
+        if period_ms is not None:
+            self.period_ms = period_ms
+        if limit is not None:
+            self.limit = limit
+        dt = self.period_ms/1000
+        kp_q = int(self.kp*(1 << SHIFT))
+        ki_q = int(self.ki*dt*(1 << SHIFT))
+        kd_q = int(self.kd/dt*(1 << SHIFT))
+        lim_q = self.limit << SHIFT
+        # inputs are clamped so that every product stays within the output
+        # range, which keeps them small ints; beyond that the output
+        # saturates anyway
+        state = pyb.disable_irq()
+        self.kp_q = kp_q
+        self.ki_q = ki_q
+        self.kd_q = kd_q
+        self.lim_q = lim_q
+        self.e_lim = lim_q//max(abs(kp_q), 1) + 1
+        self.i_lim = lim_q//max(abs(ki_q), 1) + 1
+        self.d_lim = lim_q//max(abs(kd_q), 1) + 1
+        if self.integral > lim_q:
+            self.integral = lim_q
+        elif self.integral < -lim_q:
+            self.integral = -lim_q
+        pyb.enable_irq(state)
+
+    def reset(self):
+        """!
+        Clears the integral and the previous measurement
+        """
+        self.integral = 0
+        self.last = None
+
+    def update(self, setpoint, measured):
+        """!
+        Computes the duty cycle for one control period
+        @param setpoint Desired position in encoder ticks
+        @param measured Present position in encoder ticks
+        @returns Duty cycle in whole percent, within +/- limit
+        """
+        error = setpoint - measured
+        lim_q = self.lim_q
+
+        e = error
+        lim = self.e_lim
+        if e > lim:
+            e = lim
+        elif e < -lim:
+            e = -lim
+        out = self.kp_q*e
+
+        if self.kd_q and self.last is not None:
+            d = measured - self.last
+            lim = self.d_lim
+            if d > lim:
+                d = lim
+            elif d < -lim:
+                d = -lim
+            out -= self.kd_q*d
+        self.last = measured
+
+        out += self.integral
+        if out > lim_q:
+            out = lim_q
+        elif out < -lim_q:
+            out = -lim_q
+
+        if self.ki_q:
+            e = error
+            lim = self.i_lim
+            if e > lim:
+                e = lim
+            elif e < -lim:
+                e = -lim
+            step = self.ki_q*e
+            # only integrate when it moves the output away from its limit
+            if not (out == lim_q and step > 0 or out == -lim_q and step < 0):
+                integral = self.integral + step
+                if integral > lim_q:
+                    integral = lim_q
+                elif integral < -lim_q:
+                    integral = -lim_q
+                self.integral = integral
+
+        # shift towards zero so small errors of either sign give zero duty
+        if out < 0:
+            return -(-out >> SHIFT)
+        return out >> SHIFT
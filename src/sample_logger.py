@@ -0,0 +1,87 @@
+"""! @file sample_logger.py
+Fixed size logger for control loop samples. Every sample is written into an
+array allocated before the run, so logging in the control loop neither
+allocates memory nor waits on the serial port; the samples are sent in one
+go after the run.
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+from array import array
+
+## Values stored per sample: time (ms), setpoint, position (ticks), applied
+## duty (%)
+FIELDS = 4
+
+
+class SampleLogger:
+    """!
+    This class stores samples in one array('i') buffer, one record of FIELDS
+    integers after another, so a block of records can be sent straight from
+    the buffer without copying
+    """
+
+    def __init__(self, capacity):
+        """!
+        Allocates the buffer
+        @param capacity Largest number of samples one run can hold
+        """
+        self.capacity = capacity
+        self.data = array('i', (0 for n in range(FIELDS*capacity)))
+        self.count = 0
+        ## Samples that arrived after the buffer was full
+        self.dropped = 0
+
+    def clear(self):
+        """!
+        Empties the logger for a new run without freeing the buffer
+        """
+        self.count = 0
+        self.dropped = 0
+
+    def record(self, t, setpoint, position, duty):
+        """!
+        Stores one sample. Does nothing but count it once the buffer is full.
+        @param t Time of the sample in ms
+        @param setpoint Setpoint in encoder ticks
+        @param position Position in encoder ticks
+        @param duty Duty cycle asked of the motor, in whole percent; it is
+               stored as the motor driver applies it, saturated at +/-100
+        """
+        n = self.count
+        if n == self.capacity:
+            self.dropped += 1
+            return
+        if duty > 100:
+            duty = 100
+        elif duty < -100:
+            duty = -100
+        i = n*FIELDS
+        data = self.data
+        data[i] = t
+        data[i + 1] = setpoint
+        data[i + 2] = position
+        data[i + 3] = duty
+        self.count = n + 1
+
+    def records(self):
+        """!
+        Returns a memoryview of the stored records, FIELDS integers each
+        """
+        return memoryview(self.data)[:self.count*FIELDS]
+
+    def dump_text(self):
+        """!
+        Prints "time, position" lines, the format the plotting tool reads
+        """
+        data = self.data
+        for i in range(0, self.count*FIELDS, FIELDS):
+            print(f"{data[i]}, {data[i + 2]}")
+
+    def dump_frames(self, writer):
+        """!
+        Sends the stored records as binary telemetry frames
+        @param writer TelemetryWriter set up for FIELDS fields per record
+        """
+        writer.add_block(self.records())
@@ -0,0 +1,282 @@
+"""! @file scheduler.py
+Priority scheduler for generator tasks, used by main.py in place of cotask.
+Every task has a period and a deadline in microseconds, and release times
+are kept with time.ticks_add/ticks_diff, so the schedule never drifts and
+survives the tick counter wrapping. Each run is checked against its
+deadline and its period, and the results go into fixed-size buffers: the
+TimingStats histograms of loop_timing and a short history of CPU load. When
+the load stays too high, the periods of the least important tasks are
+lengthened step by step, up to their configured limits, so the important
+ones keep running on time; once the load drops they are shortened again.
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import gc
+import time
+from array import array
+from loop_timing import TimingStats, all_loops
+import heap_profile
+
+## CPU load windows kept in the load history
+LOAD_HISTORY = 16
+
+
+class Task:
+    """!
+    This class runs a generator function as a periodic task
+    """
+
+    def __init__(self, fun, name, priority=0, period=10, deadline=None,
+                 max_period=None, buckets=16):
+        """!
+        Creates a task; it first runs as soon as the scheduler starts
+        @param fun Generator function; each next() is one run of the task
+        @param name Name printed with the results, without spaces
+        @param priority Larger numbers run first when tasks are ready together
+        @param period Time between runs in milliseconds
+        @param deadline Time after its release by which a run must finish, in
+               milliseconds; the period if None
+        @param max_period Longest period in milliseconds the scheduler may
+               stretch this task to when the CPU is overloaded; None keeps the
+               period fixed
+        @param buckets Number of histogram buckets of the timing statistics
+        """
+        self.gen = fun()
+        self.name = name
+        self.priority = priority
+        self.base_us = int(period*1000)
+        self.period_us = self.base_us
+        self.max_us = self.base_us if max_period is None else int(max_period*1000)
+        self.deadline_us = self.base_us if deadline is None else int(deadline*1000)
+        bucket_us = max(self.base_us//buckets, 1)
+        self.exec = TimingStats(name + '.exec', bucket_us, buckets)
+        self.late = TimingStats(name + '.late', bucket_us, buckets)
+        ## Release time of the next run, set when the scheduler starts
+        self.next_us = None
+        ## Runs that finished after their deadline
+        self.missed = 0
+        ## Runs that started a whole period or more after their release
+        self.late_starts = 0
+        ## Runs that took longer than a whole period by themselves
+        self.overruns = 0
+        ## Releases dropped because the task was more than a period behind
+        self.skipped = 0
+        self.done = False
+        ## HeapStats of the task's runs, if the scheduler profiles the heap
+        self.heap = None
+        # listed with the LoopTimers, so loop_timing.show_all() and
+        # fetch_timing.py report its late starts and missed deadlines too
+        all_loops.append(self)
+
+    def run(self, now):
+        """!
+        Runs the task once and checks the run against its deadline
+        @param now ticks_us() value at the start of the run
+        @returns Run time in microseconds
+        """
+        release = self.next_us
+        late = time.ticks_diff(now, release)
+        self.late.add(late)
+        if late >= self.period_us:
+            self.late_starts += 1
+        heap = self.heap
+        if heap is not None:
+            before = gc.mem_alloc()
+            # time the run from here, so a collection that started before it
+            # is not taken for one of its own
+            now = time.ticks_us()
+        try:
+            next(self.gen)
+        except StopIteration:
+            self.done = True
+        if heap is not None:
+            after = gc.mem_alloc()
+        end = time.ticks_us()
+        took = time.ticks_diff(end, now)
+        if heap is not None:
+            runs = self.exec.count
+            heap.add(before, after, took, self.exec.total_us//runs if runs else took)
+        self.exec.add(took)
+        if took > self.period_us:
+            self.overruns += 1
+        if time.ticks_diff(end, release) > self.deadline_us:
+            self.missed += 1
+        # release times advance by whole periods, except after falling a
+        # period or more behind, when the missed releases are dropped
+        release = time.ticks_add(release, self.period_us)
+        behind = time.ticks_diff(end, release)
+        if behind >= self.period_us:
+            drop = behind//self.period_us
+            self.skipped += drop
+            release = time.ticks_add(release, drop*self.period_us)
+        self.next_us = release
+        return took
+
+    def counters(self):
+        """!
+        Returns the counters loop_timing.show_all() prints, as (name, value)
+        pairs
+        """
+        return (('late_starts', self.late_starts), ('deadline_misses', self.missed))
+
+    def __str__(self):
+        runs = self.exec.count
+        mean = self.exec.total_us//runs if runs else 0
+        return (f"{self.name:<16}{self.priority:>4}{self.base_us//1000:>6}"
+                f"{self.period_us//1000:>6}{runs:>8}{self.missed:>7}"
+                f"{self.overruns:>7}{self.skipped:>7}{mean:>7}"
+                f"{self.exec.worst_us:>7}{self.late.worst_us:>7}")
+
+
+class Scheduler:
+    """!
+    This class runs the ready task of highest priority, one run at a time,
+    and sleeps until the next release when no task is ready
+    """
+
+    def __init__(self, window_ms=1000, high=900, low=600, heap=False,
+                 idle_gc_bytes=None):
+        """!
+        Creates a scheduler with no tasks
+        @param window_ms Time over which the CPU load is measured between
+               period adjustments
+        @param high Load in tenths of a percent above which a stretchable
+               task's period is lengthened
+        @param low Load in tenths of a percent below which a stretched
+               task's period is shortened again
+        @param heap True to record the heap allocations of every task run
+               and the collections that land inside them
+        @param idle_gc_bytes Bytes allocated after which gc.collect() is run
+               in idle time, or None to leave collections to MicroPython
+        """
+        self.tasks = []
+        self.heap = heap
+        self.collector = (None if idle_gc_bytes is None
+                          else heap_profile.IdleCollector(idle_gc_bytes))
+        ## Tasks that have not finished
+        self.active = 0
+        self.window_us = window_ms*1000
+        self.high = high
+        self.low = low
+        ## CPU load of the latest windows in tenths of a percent, oldest first
+        self.load = array('H', (0 for n in range(LOAD_HISTORY)))
+        self.windows = 0
+        self.busy_us = 0
+        self.window_missed = 0
+        self.window_start = None
+        ## Period changes made, lengthening and shortening
+        self.stretched = 0
+        self.restored = 0
+
+    def append(self, task):
+        """!
+        Adds a task, keeping the list in order of decreasing priority
+        """
+        if self.heap:
+            task.heap = heap_profile.HeapStats(task.name)
+        self.tasks.append(task)
+        self.active += 1
+        self.tasks.sort(key=lambda task: -task.priority)
+
+    def start(self):
+        """!
+        Releases every task now; run() does this the first time it is called
+        """
+        now = time.ticks_us()
+        for task in self.tasks:
+            task.next_us = now
+        self.window_start = now
+
+    def step(self):
+        """!
+        Runs the most important task that is due, if any
+        @returns True if a task ran
+        """
+        now = time.ticks_us()
+        for task in self.tasks:
+            if not task.done and time.ticks_diff(now, task.next_us) >= 0:
+                missed = task.missed
+                self.busy_us += task.run(now)
+                self.window_missed += task.missed - missed
+                if task.done:
+                    self.active -= 1
+                self._window(time.ticks_us())
+                return True
+        self._window(now)
+        return False
+
+    def idle_us(self):
+        """!
+        Returns the time until the next task is due, 0 if one is due now
+        """
+        now = time.ticks_us()
+        wait = self.window_us
+        for task in self.tasks:
+            if not task.done:
+                left = time.ticks_diff(task.next_us, now)
+                if left < wait:
+                    wait = left
+        return wait if wait > 0 else 0
+
+    def run(self):
+        """!
+        Runs the tasks until every one has finished; stop it with Ctrl-C
+        """
+        if self.window_start is None:
+            self.start()
+        while self.active:
+            if not self.step():
+                wait = self.idle_us()
+                if self.collector is not None and self.collector.idle(wait):
+                    continue
+                if wait:
+                    time.sleep_us(wait)
+
+    def _window(self, now):
+        # at the end of each window, record its load and adjust one period
+        elapsed = time.ticks_diff(now, self.window_start)
+        if elapsed < self.window_us:
+            return
+        load = self.busy_us//(elapsed//1000 or 1)
+        self.load[self.windows % LOAD_HISTORY] = load if load < 65535 else 65535
+        self.windows += 1
+        if load > self.high or self.window_missed:
+            # lengthen the least important task that can still be stretched
+            for task in reversed(self.tasks):
+                if task.period_us < task.max_us:
+                    task.period_us = min(task.period_us + (task.base_us >> 2 or 1),
+                                         task.max_us)
+                    self.stretched += 1
+                    break
+        elif load < self.low:
+            # give the most important stretched task its time back first
+            for task in self.tasks:
+                if task.period_us > task.base_us:
+                    task.period_us = max(task.period_us - (task.base_us >> 2 or 1),
+                                         task.base_us)
+                    self.restored += 1
+                    break
+        self.busy_us = 0
+        self.window_missed = 0
+        self.window_start = now
+
+    def loads(self):
+        """!
+        Returns the recorded window loads in tenths of a percent, oldest first
+        """
+        n = min(self.windows, LOAD_HISTORY)
+        first = self.windows - n
+        return [self.load[k % LOAD_HISTORY] for k in range(first, first + n)]
+
+    def __str__(self):
+        lines = [f"{'Task':<16}{'Pri':>4}{'Base':>6}{'Per':>6}{'Runs':>8}"
+                 f"{'Miss':>7}{'Over':>7}{'Skip':>7}{'Mean':>7}{'Worst':>7}"
+                 f"{'Late':>7}"]
+        lines.extend(str(task) for task in self.tasks)
+        lines.append(f"load (0.1%): {' '.join(str(n) for n in self.loads())}; "
+                     f"periods lengthened {self.stretched}, shortened {self.restored}")
+        if self.heap:
+            lines.append(heap_profile.table([task.heap for task in self.tasks]))
+        return '\n'.join(lines)
@@ -9,14 +9,18 @@ it will run a motor response test.
 
 import micropython
 import pyb
-import time
-import cqueue
 from motor_driver_updated import MotorDriver
 from encoder_reader_updated import Encoder
+from pid_controller import PIDController
+from cascade_controller import CascadeController
 
 # Allow interrupts to display errors
 micropython.alloc_emergency_exception_buf(100)
 
+## True to have the response test below time its set_setpoint() calls and
+## the encoder reads and duty cycle writes in them, printed after each run
+INSTRUMENT = False
+
 class Servo:
     """!
     This class uses motor control and encoder reading for the user to input a Kp value
@@ -30,8 +34,20 @@ class Servo:
         """
         self.motor = motor
         self.encoder = encoder
-        self.Kp = 0.1
         self.error = 0
+        self.PWM = 0
+        # setpoint used by the timer interrupt loop
+        self.target = 0
+        # reference speed and acceleration fed forward by a cascade controller
+        self.v_ref = 0
+        self.a_ref = 0
+        self.timer = None
+        # None for the plain floating point proportional loop
+        self.controller = None
+        self.cascaded = False
+        # True while start_timer's own proportional controller is in use
+        self.timer_controller = False
+        self.set_Kp(0.1)
         
     def run(self, level):
         """!
@@ -40,14 +56,28 @@ class Servo:
         """
         self.motor.set_duty_cycle(level)
         
-    def set_setpoint(self, setpoint):
+    def set_setpoint(self, setpoint, velocity=0, acceleration=0):
         """!
         sets the setpoint with
         @setpoint
+        @param velocity Reference speed in ticks/s, used by a cascade controller
+        @param acceleration Reference acceleration in ticks/s^2, used by a
+               cascade controller
         """
-        self.encoder.read()
-        self.error = setpoint - self.encoder.pos
-        self.PWM = self.Kp*self.error
+        enc = self.encoder
+        if self.cascaded:
+            # only the cascade needs the velocity, which sample() keeps
+            enc.sample()
+            self.error = setpoint - enc.pos
+            self.PWM = self.controller.update(setpoint, enc.pos, enc.velocity,
+                                              velocity, acceleration)
+        else:
+            enc.read()
+            self.error = setpoint - enc.pos
+            if self.controller is None:
+                self.PWM = self.Kp*self.error
+            else:
+                self.PWM = self.controller.update(setpoint, enc.pos)
         self.motor.set_duty_cycle(self.PWM)
         
     def set_Kp(self, Kp):
@@ -56,6 +86,88 @@ class Servo:
         @Kp
         """
         self.Kp = Kp
+        # a cascade controller's gains are in other units; change them with
+        # its own set_gains()
+        if self.controller is not None and not self.cascaded:
+            self.controller.set_gains(kp=Kp)
+
+    def set_controller(self, controller):
+        """!
+        Chooses the control law. With None, set_setpoint() uses the plain
+        proportional loop Kp*error without any limit on the duty cycle.
+        A CascadeController closes an inner loop on the encoder's velocity
+        and feeds forward the reference speed and acceleration.
+        @param controller A PIDController, a CascadeController, or None
+        """
+        self.controller = controller
+        self.cascaded = isinstance(controller, CascadeController)
+        self.timer_controller = False
+
+    def set_target(self, setpoint, velocity=0, acceleration=0):
+        """!
+        Changes the setpoint followed by the timer interrupt loop. Safe to
+        call from a task while the loop runs.
+        @param setpoint Position for the motor to travel to
+        @param velocity Reference speed in ticks/s, used by a cascade controller
+        @param acceleration Reference acceleration in ticks/s^2, used by a
+               cascade controller
+        """
+        self.target = setpoint
+        self.v_ref = velocity
+        self.a_ref = acceleration
+
+    def start_timer(self, timer, freq):
+        """!
+        Runs the control loop from a hardware timer interrupt instead of from
+        a task. Each interrupt reads the encoder and updates the duty cycle
+        using integer math only, through the PIDController set with
+        set_controller(), or a proportional-only one built from Kp if none is.
+        Tasks then only change the setpoint and gain with set_target() and
+        set_Kp(). With a CascadeController, freq is the rate of its inner
+        speed loop, and the position loop runs every outer_every interrupts.
+        A controller built here is dropped again by stop_timer().
+        @param timer Number of a timer not used by the motors or encoders
+        @param freq Control loop frequency in Hz
+        """
+        self.stop_timer()
+        if self.controller is None:
+            self.controller = PIDController(self.Kp)
+            self.timer_controller = True
+        self.controller.set_gains(period_ms=1000/freq)
+        self.controller.reset()
+        # the bound method is created once here, not in the interrupt
+        self._isr = self._control_isr
+        self.timer = pyb.Timer(timer, freq=freq, callback=self._isr)
+
+    def stop_timer(self):
+        """!
+        Stops the timer interrupt loop, if running, and stops the motor.
+        set_setpoint() then uses the plain proportional loop again if
+        start_timer() had to build a controller.
+        """
+        if self.timer is not None:
+            self.timer.callback(None)
+            self.timer.deinit()
+            self.timer = None
+            self.motor.set_duty_cycle(0)
+        if self.timer_controller:
+            self.controller = None
+            self.timer_controller = False
+
+    def _control_isr(self, tim):
+        # one control update; must not allocate, so no floats
+        enc = self.encoder
+        if self.cascaded:
+            enc.sample()
+            self.error = self.target - enc.pos
+            self.PWM = self.controller.update(self.target, enc.pos, enc.velocity,
+                                              self.v_ref, self.a_ref)
+        else:
+            enc.read()
+            self.error = self.target - enc.pos
+            self.PWM = self.controller.update(self.target, enc.pos)
+        self.motor.set_duty_cycle(self.PWM)
+
     def plot_results():
         position = []
         time = [10*x for x in range(500)]
@@ -66,25 +178,37 @@ class Servo:
 
     
 if __name__ == "__main__":  
+    from sample_logger import SampleLogger
+    import loop_timing
     # run motor response test
     moe = MotorDriver(pyb.Pin.board.PA10, pyb.Pin.board.PB4, 1,  pyb.Pin.board.PB5, 2, 3)
     enc = Encoder(pyb.Pin.board.PC6, pyb.Pin.board.PC7, 8, 1, 2)
     serv = Servo(moe, enc)
+    if INSTRUMENT:
+        loop_timing.instrument(serv, 'set_setpoint',
+                               loop_timing.TimingStats('Servo.set_setpoint', bucket_us=10), 1)
+        loop_timing.instrument(enc, 'read', loop_timing.TimingStats('Encoder.read', bucket_us=10))
+        loop_timing.instrument(moe, 'set_duty_cycle',
+                               loop_timing.TimingStats('set_duty_cycle', bucket_us=10), 1)
     num = 500
+    log = SampleLogger(num)
     while True:
         input_kp = float(input('Please input a value for Kp: '))
         serv.set_Kp(input_kp)
         input_setp = int(input('Please input a value for the setpoint: '))
         serv.set_setpoint(input_setp)
         
-        positions = []
-        times = [10*x for x in range(num)]
+        log.clear()
         for n in range(num):
             serv.set_setpoint(input_setp)
-            time.sleep_ms(10)
-            positions.append(serv.encoder.read())
-            print(f"{times[n]}, {serv.encoder.read()}")
+            pyb.delay(10)
+            log.record(10*n, input_setp, serv.encoder.read(), int(serv.PWM))
         serv.run(0)
+        log.dump_text()
         print('End')
+        if INSTRUMENT:
+            print(loop_timing.show_all())
+            for stats in loop_timing.all_stats:
+                stats.reset()
             
     
\ No newline at end of file
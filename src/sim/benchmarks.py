@@ -0,0 +1,329 @@
+"""! @file benchmarks.py
+Micro-benchmarks of the driver, controller and serial parsing hot paths,
+run on the PC against the simulated pyb module and a stand-in serial port.
+Each benchmark reports the time per call, the heap memory one call
+allocates, measured with tracemalloc, and the calls per second. Results can be saved as a baseline JSON file
+and later runs compared against it, failing when a benchmark got slower
+than the allowed ratio.
+
+    python src/sim/benchmarks.py --save baseline.json
+    python src/sim/benchmarks.py --compare baseline.json --threshold 1.25
+
+The times are CPython times, useful for spotting regressions between
+changes rather than for predicting times on the board. The same goes for
+the allocations: CPython allocates every int above 256, which MicroPython
+keeps in the object pointer, so a rise is what to look for.
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import argparse
+import gc
+import itertools
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [_HERE, os.path.join(_HERE, os.pardir),
+                os.path.join(_HERE, os.pardir, 'Used for Motor Testing')]
+
+import pyb
+import motor_plant
+from motor_driver_updated import MotorDriver
+from encoder_reader_updated import Encoder
+from servo_updated import Servo
+from pid_controller import PIDController
+from multi_axis import MultiAxis
+
+## Every benchmark, by name, filled in by the @benchmark decorator
+BENCHMARKS = {}
+
+
+def benchmark(name, items=1):
+    """!
+    Registers a benchmark. The decorated function sets up the objects it
+    needs and returns the function to time, which takes no arguments.
+    @param name Benchmark name used in reports and baseline files
+    @param items Work items, such as parsed samples, done by one call
+    """
+    def register(setup):
+        BENCHMARKS[name] = (setup, items)
+        return setup
+    return register
+
+
+class _CounterScript:
+    """!
+    Timer stand-in whose counter cycles through given values, to drive
+    Encoder.read through a chosen branch on every call
+    """
+
+    def __init__(self, values):
+        self.values = values
+        self.n = 0
+
+    def counter(self, value=None):
+        self.n = (self.n + 1) % len(self.values)
+        return self.values[self.n]
+
+
+class StandInSerial:
+    """!
+    Serial port stand-in that replays the same received bytes on every run
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def rewind(self):
+        self.pos = 0
+
+    @property
+    def in_waiting(self):
+        return len(self.data) - self.pos
+
+    def read(self, size=1):
+        chunk = self.data[self.pos:self.pos + size]
+        self.pos += len(chunk)
+        return chunk
+
+    def readline(self):
+        end = self.data.find(b'\n', self.pos) + 1 or len(self.data)
+        return self.read(end - self.pos)
+
+
+def _motor():
+    return MotorDriver(pyb.Pin.board.PA10, pyb.Pin.board.PB4, 1, pyb.Pin.board.PB5, 2, 3)
+
+
+def _encoder(values=None):
+    enc = Encoder(pyb.Pin.board.PC6, pyb.Pin.board.PC7, 8, 1, 2)
+    if values is not None:
+        enc.reader = _CounterScript(values)
+    return enc
+
+
+@benchmark('encoder_read')
+def _encoder_read():
+    return _encoder(list(range(0, 65536, 97))).read
+
+
+@benchmark('encoder_read_wrap')
+def _encoder_read_wrap():
+    # alternating big jumps take the underflow and overflow branches in turn
+    return _encoder([0, 40000]).read
+
+
+@benchmark('encoder_sample')
+def _encoder_sample():
+    # the read with the velocity bookkeeping a cascade controller needs
+    return _encoder(list(range(0, 65536, 97))).sample
+
+
+def _duty(levels):
+    # alternate between two levels, as a setting the driver already holds
+    # returns before any write and would only time that early return
+    moe = _motor()
+    levels = itertools.cycle(levels)
+    return lambda: moe.set_duty_cycle(next(levels))
+
+
+@benchmark('set_duty_cycle_forward')
+def _duty_forward():
+    return _duty((50, 60))
+
+
+@benchmark('set_duty_cycle_reverse')
+def _duty_reverse():
+    return _duty((-50, -60))
+
+
+@benchmark('set_duty_cycle_stop')
+def _duty_stop():
+    # every other call stops the motor from a forward duty
+    return _duty((0, 10))
+
+
+@benchmark('servo_set_setpoint')
+def _servo():
+    serv = Servo(_motor(), _encoder(list(range(0, 60000, 300))))
+    serv.set_Kp(0.05)
+    return lambda: serv.set_setpoint(100000)
+
+
+@benchmark('servo_set_setpoint_pid')
+def _servo_pid():
+    serv = Servo(_motor(), _encoder(list(range(0, 60000, 300))))
+    serv.set_controller(PIDController(0.05, 0.01, 0.001))
+    return lambda: serv.set_setpoint(100000)
+
+
+@benchmark('multi_axis_update_2')
+def _multi_axis():
+    axes = MultiAxis([
+        dict(motor=(pyb.Pin.board.PA10, pyb.Pin.board.PB4, 1, pyb.Pin.board.PB5, 2, 3),
+             encoder=(pyb.Pin.board.PC6, pyb.Pin.board.PC7, 8, 1, 2), setpoint=100000),
+        dict(motor=(pyb.Pin.board.PC1, pyb.Pin.board.PA0, 1, pyb.Pin.board.PA1, 2, 5),
+             encoder=(pyb.Pin.board.PB6, pyb.Pin.board.PB7, 4, 1, 2), setpoint=-150000)])
+    return axes.update
+
+
+_SAMPLES = 500
+
+
+@benchmark('host_parse_text', items=_SAMPLES)
+def _parse_text():
+    from telemetry import read_text
+    ser = StandInSerial(b'ms between control feedback: 50\r\n'
+                        + b''.join(f"{10*n}, {200*n}\r\n".encode() for n in range(_SAMPLES))
+                        + b'End\r\n')
+
+    def run():
+        ser.rewind()
+        read_text(ser)
+    return run
+
+
+@benchmark('host_parse_binary', items=_SAMPLES)
+def _parse_binary():
+    import io
+    from telemetry import TelemetryWriter, read_binary
+    out = io.BytesIO()
+    writer = TelemetryWriter(out, fields=4)
+    for n in range(_SAMPLES):
+        writer.add(10*n, 100000, 200*n, 50)
+    writer.end()
+    ser = StandInSerial(out.getvalue())
+
+    def run():
+        ser.rewind()
+        read_binary(ser)
+    return run
+
+
+def measure(fun, min_time=0.2, repeats=5):
+    """!
+    Times a function
+    @param fun Function taking no arguments
+    @param min_time Shortest time in seconds one repeat should last
+    @param repeats Number of repeats; the fastest is kept
+    @returns Nanoseconds per call
+    """
+    calls = 1
+    while True:
+        start = time.perf_counter_ns()
+        for n in range(calls):
+            fun()
+        spent = time.perf_counter_ns() - start
+        if spent >= min_time*1e9/10:
+            break
+        calls *= 4
+    calls = max(int(calls*min_time*1e9/max(spent, 1)), 1)
+
+    best = None
+    gc.disable()
+    try:
+        for r in range(repeats):
+            start = time.perf_counter_ns()
+            for n in range(calls):
+                fun()
+            spent = time.perf_counter_ns() - start
+            best = spent if best is None else min(best, spent)
+    finally:
+        gc.enable()
+    return best/calls
+
+
+def allocated(fun, calls=100):
+    """!
+    Measures the heap memory a function allocates, after it has been timed
+    so caches are already filled
+    @param fun Function taking no arguments
+    @param calls Number of calls measured
+    @returns Mean over the calls of the most memory in use during one call
+             beyond what was in use before it, in bytes; memory freed before
+             the call returns is counted too
+    """
+    tracemalloc.start()
+    try:
+        total = 0
+        for n in range(calls):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            fun()
+            total += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return total/calls
+
+
+def run_all(names=None, min_time=0.2):
+    """!
+    Runs benchmarks
+    @param names Benchmarks to run, all if None
+    @param min_time Shortest time in seconds one repeat should last
+    @returns Dict of results by name, each with ns_per_call,
+             bytes_per_call and items_per_s
+    """
+    results = {}
+    for name, (setup, items) in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        motor_plant.bench.reset()
+        fun = setup()
+        ns = measure(fun, min_time)
+        results[name] = dict(ns_per_call=round(ns, 1),
+                             bytes_per_call=round(allocated(fun), 1),
+                             items_per_s=round(items*1e9/ns))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """!
+    Finds benchmarks that got slower than allowed
+    @param results Results of this run
+    @param baseline Results loaded from a baseline file
+    @param threshold Largest allowed ratio of new to baseline time per call
+    @returns List of (name, ratio) for every benchmark over the threshold
+    """
+    slower = []
+    for name, result in results.items():
+        if name in baseline:
+            ratio = result['ns_per_call']/baseline[name]['ns_per_call']
+            if ratio > threshold:
+                slower.append((name, ratio))
+    return slower
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Driver and parser micro-benchmarks')
+    parser.add_argument('names', nargs='*', help='benchmarks to run, all by default')
+    parser.add_argument('--save', help='write the results to this baseline file')
+    parser.add_argument('--compare', help='baseline file to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='fail when a benchmark takes this many times its baseline')
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='seconds per timing repeat')
+    args = parser.parse_args()
+
+    results = run_all(args.names, args.min_time)
+
+    print(f"{'benchmark':<28}{'ns/call':>12}{'bytes/call':>13}{'items/s':>14}")
+    for name, result in results.items():
+        print(f"{name:<28}{result['ns_per_call']:>12.1f}"
+              f"{result['bytes_per_call']:>13.1f}{result['items_per_s']:>14}")
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            slower = compare(results, json.load(file), args.threshold)
+        for name, ratio in slower:
+            print(f"SLOWER: {name} takes {ratio:.2f}x its baseline time")
+        sys.exit(1 if slower else 0)
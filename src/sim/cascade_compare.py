@@ -0,0 +1,127 @@
+"""! @file cascade_compare.py
+Compares the cascade controller with the proportional loop on the motor
+model, as quoted in the README. Each controller runs from Servo's timer
+interrupt while the servo follows the same S-curve move, with the target
+changed every 10 ms as a task would; the cascade also gets the move's speed
+and acceleration as feedforward. The table lists the tracking error of each
+and the time its interrupt handler takes per second, measured on the PC.
+
+    python src/sim/cascade_compare.py
+
+The errors come from the simulation and hold on the board as far as the
+motor model does; the interrupt times are CPython times, so only their
+ratio is meaningful.
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import argparse
+import os
+import sys
+import numpy as np
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [_HERE, os.path.join(_HERE, os.pardir)]
+
+import pyb
+import motor_plant
+from motor_driver_updated import MotorDriver
+from encoder_reader_updated import Encoder
+from servo_updated import Servo
+from pid_controller import PIDController
+from cascade_controller import CascadeController
+from motion_profile import s_curve, derivatives
+from benchmarks import measure
+
+## Move followed by every controller: start, end, speed, acceleration and
+## jerk limits, in ticks and seconds
+MOVE = (0, 100000, 60000, 400000, 4000000)
+## Time between target changes in ms, as in a task
+TASK_MS = 10
+## Time after the end of the move that is still measured, in task periods
+HOLD = 50
+
+## Gains of the cascade: position, speed, speed integral and the speed and
+## acceleration feedforward, which are 1/gain and tau/gain of the motor model
+CASCADE_GAINS = (20, 0.002, 0.02, 1/1200, 0.05/1200)
+
+
+def _servo(controller):
+    motor_plant.bench.reset()
+    moe = MotorDriver(pyb.Pin.board.PA10, pyb.Pin.board.PB4, 1, pyb.Pin.board.PB5, 2, 3)
+    enc = Encoder(pyb.Pin.board.PC6, pyb.Pin.board.PC7, 8, 1, 2)
+    serv = Servo(moe, enc)
+    serv.set_controller(controller)
+    return serv
+
+
+def track(controller, freq, feedforward=False):
+    """!
+    Follows the move with a controller in Servo's timer interrupt
+    @param controller PIDController or CascadeController
+    @param freq Interrupt rate in Hz
+    @param feedforward True to pass the move's speed and acceleration
+    @returns Tuple of RMS, largest and final tracking error in ticks
+    """
+    table = s_curve(*MOVE, TASK_MS)
+    vel, acc = derivatives(table, TASK_MS)
+    serv = _servo(controller)
+    serv.start_timer(6, freq)
+    errors = np.empty(len(table) + HOLD)
+    for k in range(len(errors)):
+        i = min(k, len(table) - 1)
+        if feedforward:
+            serv.set_target(table[i], vel[i], acc[i])
+        else:
+            serv.set_target(table[i])
+        pyb.delay(TASK_MS)
+        errors[k] = table[i] - serv.encoder.pos
+    serv.stop_timer()
+    return np.sqrt(np.mean(errors**2)), np.abs(errors).max(), errors[-1]
+
+
+def isr_us(controller, freq):
+    """!
+    Times Servo's interrupt handler, encoder read included, taking the
+    fastest of several repeats as benchmarks.py does
+    @param controller PIDController or CascadeController
+    @param freq Interrupt rate in Hz
+    @returns Handler time per second of control, in microseconds
+    """
+    serv = _servo(controller)
+    controller.set_gains(period_ms=1000/freq)
+    serv.set_target(MOVE[1])
+    isr = serv._control_isr
+    return measure(lambda: isr(None))*freq/1000
+
+
+def compare():
+    """!
+    Runs every configuration
+    @returns List of (name, rms, worst, final, isr_us_per_s) rows
+    """
+    configs = [
+        ('P 100 Hz', lambda: PIDController(0.05), 100, False),
+        ('P 500 Hz', lambda: PIDController(0.05), 500, False),
+        ('cascade 200/50 Hz', lambda: CascadeController(*CASCADE_GAINS[:3], period_ms=5,
+                                                        outer_every=4), 200, False),
+        ('cascade 200/50 Hz ff', lambda: CascadeController(*CASCADE_GAINS, period_ms=5,
+                                                           outer_every=4), 200, True),
+    ]
+    rows = []
+    for name, make, freq, feedforward in configs:
+        rms, worst, final = track(make(), freq, feedforward)
+        rows.append((name, rms, worst, final, isr_us(make(), freq)))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Cascade against proportional control')
+    parser.parse_args()
+
+    rows = compare()
+
+    print(f"{'controller':<24}{'rms':>8}{'worst':>8}{'final':>8}{'isr us/s':>10}")
+    for name, rms, worst, final, cost in rows:
+        print(f"{name:<24}{rms:>8.0f}{worst:>8.0f}{final:>8.0f}{cost:>10.0f}")
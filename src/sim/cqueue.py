@@ -0,0 +1,45 @@
+"""! @file cqueue.py
+Stand-in for the ME405 cqueue module when running board code on a PC with
+the simulated pyb module.
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+
+class _Queue:
+    """!
+    This class is a fixed size first in, first out queue
+    """
+
+    def __init__(self, size):
+        self._size = size
+        self._items = []
+
+    def put(self, item):
+        if len(self._items) >= self._size:
+            self._items.pop(0)
+        self._items.append(item)
+
+    def get(self):
+        return self._items.pop(0)
+
+    def any(self):
+        return len(self._items) > 0
+
+    def available(self):
+        return len(self._items)
+
+    def full(self):
+        return len(self._items) >= self._size
+
+    def clear(self):
+        self._items = []
+
+
+class IntQueue(_Queue):
+    pass
+
+
+class FloatQueue(_Queue):
+    pass
@@ -0,0 +1,71 @@
+"""! @file gc.py
+Stand-in for the MicroPython gc module when running board code on a PC with
+the simulated pyb module. It models MicroPython's heap, which only gives
+memory back when it collects: mem_alloc() counts what board code allocated
+since the last collection, measured with tracemalloc from the first call
+on, and collect() takes simulated time in proportion to it. Everything else
+is CPython's own gc.
+
+CPython's gc is built in, so it is found before this file on the path;
+the simulated pyb loads this file itself and binds it as gc only in board
+modules imported after it. CPython's module is left as it is, and until
+mem_alloc() is first called nothing is traced and collect() takes no
+simulated time, so host tools importing the simulator run as before.
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import gc as _cpython
+import tracemalloc as _tracemalloc
+from motor_plant import bench
+
+## Size of the simulated heap in bytes, as on a Nucleo with 96 KB of RAM
+HEAP_BYTES = 80*1024
+## Simulated time a collection takes per kilobyte in use, in nanoseconds
+GC_NS_PER_KB = 20000
+
+## Bytes allocated since the last collection
+_used = 0
+## Traced memory at the last reading
+_mark = 0
+
+
+def mem_alloc():
+    """!
+    Returns the bytes allocated since the last collection; collects first
+    if that fills the heap
+    """
+    global _used, _mark
+    if not _tracemalloc.is_tracing():
+        _tracemalloc.start()
+    current, peak = _tracemalloc.get_traced_memory()
+    # CPython frees at once, so count the growth since the last reading as
+    # allocated and never given back
+    _used += max(peak - _mark, 0)
+    _tracemalloc.reset_peak()
+    _mark = current
+    if _used > HEAP_BYTES:
+        collect()
+    return _used
+
+
+def mem_free():
+    return HEAP_BYTES - mem_alloc()
+
+
+def collect():
+    """!
+    Collects, taking simulated time in proportion to the heap in use
+    """
+    global _used, _mark
+    _cpython.collect()
+    bench.advance_ns(_used*GC_NS_PER_KB//1024)
+    _used = 0
+    if _tracemalloc.is_tracing():
+        _tracemalloc.reset_peak()
+        _mark = _tracemalloc.get_traced_memory()[0]
+
+
+def __getattr__(name):
+    return getattr(_cpython, name)
@@ -0,0 +1,38 @@
+"""! @file micropython.py
+Stand-in for the MicroPython micropython module when running board code on
+a PC with the simulated pyb module.
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+
+def const(value):
+    return value
+
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+
+def native(fun):
+    return fun
+
+
+viper = native
+
+
+def schedule(fun, arg):
+    fun(arg)
+
+
+def heap_lock():
+    return 0
+
+
+def heap_unlock():
+    return 0
+
+
+def mem_info(verbose=False):
+    print('mem: simulated')
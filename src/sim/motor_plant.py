@@ -0,0 +1,250 @@
+"""! @file motor_plant.py
+Physics model behind the simulated pyb module. A virtual clock advances
+every wired DC motor whenever board code sleeps, so firmware written for the
+Nucleo runs on a PC faster than real time.
+Each motor is a first order velocity model driven by the duty cycle that the
+motor driver pins and PWM channels hold; its shaft position is reported
+through a 16-bit quadrature encoder timer, including wrap.
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import math
+
+## Frequency feeding the simulated timers, in Hz (Nucleo-L476RG core clock)
+TIMER_SOURCE_FREQ = 80000000
+
+# marks a motor whose input has not been sampled yet
+_UNSET = object()
+
+
+class MotorPlant:
+    """!
+    This class models a DC gearmotor with an encoder. Between two changes of
+    its input the velocity follows the exact exponential solution, so a step
+    costs the same no matter how long the simulated interval is.
+    """
+
+    def __init__(self, gain=1200.0, tau=0.05, deadband=2.0, dead_time=0.0,
+                 coast_tau=0.3):
+        """!
+        Creates a motor at rest at position zero.
+        @param gain Steady state speed in encoder ticks per second per percent duty
+        @param tau Mechanical time constant while driven or braked, in seconds
+        @param deadband Duty cycle in percent needed to overcome friction
+        @param dead_time Delay between a duty change and its effect, in seconds
+        @param coast_tau Time constant while the driver is disabled, in seconds
+        """
+        self.gain = gain
+        self.tau = tau
+        self.deadband = deadband
+        self.dead_time = dead_time
+        self.coast_tau = coast_tau
+        self.pos = 0.0
+        self.vel = 0.0
+        # duty cycles waiting out the dead time, as (apply time in ns, duty)
+        self.pending = []
+        self.applied = None
+        self.commanded = _UNSET
+        ## Function returning the present duty in percent, or None when coasting
+        self.source = lambda: 0.0
+
+    def set_params(self, gain=None, tau=None, deadband=None, dead_time=None,
+                   coast_tau=None):
+        """!
+        Changes any of the model parameters, for example to load the result
+        of a system identification run.
+        """
+        if gain is not None:
+            self.gain = gain
+        if tau is not None:
+            self.tau = tau
+        if deadband is not None:
+            self.deadband = deadband
+        if dead_time is not None:
+            self.dead_time = dead_time
+        if coast_tau is not None:
+            self.coast_tau = coast_tau
+
+    def reset(self, pos=0.0, vel=0.0):
+        """!
+        Puts the shaft back to a given position and speed
+        @param pos Position in encoder ticks
+        @param vel Speed in encoder ticks per second
+        """
+        self.pos = pos
+        self.vel = vel
+        self.pending = []
+        self.applied = None
+        self.commanded = _UNSET
+
+    def counts(self):
+        """!
+        Returns the position as a whole number of encoder ticks
+        """
+        return math.floor(self.pos)
+
+    def _integrate(self, duty, dt):
+        # closed form solution of tau*dv/dt + v = gain*u over dt seconds
+        if duty is None:
+            target = 0.0
+            tau = self.coast_tau
+        else:
+            mag = abs(duty) - self.deadband
+            target = math.copysign(self.gain*mag, duty) if mag > 0 else 0.0
+            tau = self.tau
+        decay = math.exp(-dt/tau)
+        self.pos += target*dt + (self.vel - target)*tau*(1.0 - decay)
+        self.vel = target + (self.vel - target)*decay
+
+    def step(self, t0_ns, t1_ns):
+        """!
+        Advances the motor from one clock time to another. The input is
+        sampled once at the start; board code cannot change it mid-interval.
+        @param t0_ns Present clock time in nanoseconds
+        @param t1_ns Clock time to advance to in nanoseconds
+        """
+        duty = self.source()
+        if duty != self.commanded:
+            self.commanded = duty
+            self.pending.append((t0_ns + int(self.dead_time*1e9), duty))
+        t = t0_ns
+        while self.pending and self.pending[0][0] <= t1_ns:
+            when, nxt = self.pending.pop(0)
+            if when > t:
+                self._integrate(self.applied, (when - t)*1e-9)
+                t = when
+            self.applied = nxt
+        if t1_ns > t:
+            self._integrate(self.applied, (t1_ns - t)*1e-9)
+
+
+class Bench:
+    """!
+    This class holds the virtual clock, the simulated peripherals and the
+    wiring between motor drivers, motors and encoder timers.
+    """
+
+    def __init__(self):
+        """!
+        Creates an empty bench at time zero.
+        """
+        self.now_ns = 0
+        ## Simulated pins by name, filled in by pyb.Pin
+        self.pins = {}
+        ## Simulated timers by number, filled in by pyb.Timer
+        self.timers = {}
+        ## Encoder timer number to the motor it reads
+        self.encoders = {}
+        self.plants = []
+
+    def wire(self, plant, en, timer, ch_fwd, ch_rev, encoder):
+        """!
+        Connects a motor to the driver pins that power it and the timer that
+        counts its encoder.
+        @param plant MotorPlant to connect
+        @param en Name of the driver enable pin, such as 'PA10'
+        @param timer PWM timer number of the driver
+        @param ch_fwd Timer channel that drives the motor forward
+        @param ch_rev Timer channel that drives the motor in reverse
+        @param encoder Timer number counting the motor's encoder
+        @returns The plant that was wired
+        """
+        def source():
+            pin = self.pins.get(en)
+            tim = self.timers.get(timer)
+            if pin is None or tim is None or not pin.value():
+                return None
+            return tim.percent(ch_fwd) - tim.percent(ch_rev)
+        plant.source = source
+        self.plants.append(plant)
+        self.encoders[encoder] = plant
+        return plant
+
+    def unwire(self):
+        """!
+        Removes every motor from the bench
+        """
+        self.plants = []
+        self.encoders = {}
+
+    def reset(self):
+        """!
+        Returns the clock to zero, forgets every peripheral and puts each
+        motor back at rest. The wiring is kept.
+        """
+        self.now_ns = 0
+        self.pins = {}
+        self.timers = {}
+        for plant in self.plants:
+            plant.reset()
+
+    def advance_ns(self, ns):
+        """!
+        Lets simulated time pass, running timer callbacks when they fall due
+        @param ns Time to advance in nanoseconds
+        """
+        end = self.now_ns + ns
+        while True:
+            tim = None
+            when = end
+            for t in self.timers.values():
+                if t.next_ns is not None and t.next_ns <= when:
+                    when = t.next_ns
+                    tim = t
+            self._step_to(when)
+            if tim is None:
+                break
+            tim.fire()
+
+    def _step_to(self, t_ns):
+        if t_ns > self.now_ns:
+            for plant in self.plants:
+                plant.step(self.now_ns, t_ns)
+            self.now_ns = t_ns
+
+
+## The bench every simulated peripheral belongs to
+bench = Bench()
+
+
+def wire_default():
+    """!
+    Wires two motors the way the ME405 kit connects them: motor A on timer 3
+    with enable PA10 and encoder timer 8, motor B on timer 5 with enable PC1
+    and encoder timer 4.
+    @returns Tuple of the two plants
+    """
+    bench.unwire()
+    return (bench.wire(MotorPlant(), 'PA10', 3, 1, 2, 8),
+            bench.wire(MotorPlant(), 'PC1', 5, 1, 2, 4))
+
+
+wire_default()
+
+
+if __name__ == "__main__":
+    # step response of the Servo class at a 10 ms period, run at full speed;
+    # pyb imports this file again by name, so use that copy's bench
+    import os
+    import sys
+    import time
+    sys.path[:0] = [os.path.dirname(os.path.abspath(__file__)),
+                    os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)]
+    import pyb
+    import motor_plant
+    from motor_driver_updated import MotorDriver
+    from encoder_reader_updated import Encoder
+    from servo_updated import Servo
+
+    moe = MotorDriver(pyb.Pin.board.PA10, pyb.Pin.board.PB4, 1, pyb.Pin.board.PB5, 2, 3)
+    enc = Encoder(pyb.Pin.board.PC6, pyb.Pin.board.PC7, 8, 1, 2)
+    serv = Servo(moe, enc)
+    serv.set_Kp(0.05)
+    start = time.perf_counter()
+    for n in range(500):
+        serv.set_setpoint(100000)
+        time.sleep_ms(10)
+    print(f"position {enc.read()} after {motor_plant.bench.now_ns/1e9:.1f} s simulated "
+          f"in {time.perf_counter() - start:.3f} s")
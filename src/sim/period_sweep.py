@@ -0,0 +1,218 @@
+"""! @file period_sweep.py
+Sweeps the proportional loop of Servo.set_setpoint over a grid of Kp values,
+control periods and setpoints against the motor model in motor_plant.py.
+Every grid point is advanced together as NumPy arrays, large grids are split
+across a process pool, and the result is a table of overshoot, settling time
+and CPU load per configuration. Runs on the PC, not on the board.
+
+    python src/sim/period_sweep.py --kp 0.02 0.05 0.1 --period 10 20 30 40 50
+
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import argparse
+import itertools
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from motor_plant import MotorPlant
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             os.pardir, 'Used for Motor Testing'))
+import step_metrics as _metrics
+
+## Grid points simulated by one worker process at a time
+CHUNK_SIZE = 4096
+
+## Column names of the result table, in order
+COLUMNS = ('kp', 'period_ms', 'setpoint', 'overshoot_pct', 'settling_ms',
+           'final_error', 'cpu_load_pct')
+
+
+def _integrate(pos, vel, duty, dt, plant):
+    # vectorized version of MotorPlant._integrate; duty 0 means the driver
+    # disabled the motor and lets it coast
+    mag = np.abs(duty) - plant.deadband
+    target = np.where(mag > 0, np.sign(duty)*plant.gain*mag, 0.0)
+    tau = np.where(duty == 0, plant.coast_tau, plant.tau)
+    decay = np.exp(-dt/tau)
+    pos = pos + target*dt + (vel - target)*tau*(1.0 - decay)
+    vel = target + (vel - target)*decay
+    return pos, vel
+
+
+def simulate(kp, period_ms, setpoint, duration_ms=5000, plant=None):
+    """!
+    Runs the step response of every configuration at once. Each control tick
+    reads the encoder, sets the duty to Kp times the error, clamped to +/-100
+    percent as the PWM channels do, and holds it for one period.
+    @param kp Array of proportional gains in percent duty per tick
+    @param period_ms Array of control periods in milliseconds
+    @param setpoint Array of setpoints in encoder ticks
+    @param duration_ms Length of every run in milliseconds
+    @param plant MotorPlant holding the model parameters, default if None
+    @returns Positions sampled after every tick, shape (configs, ticks); NaN
+             once a run has ended
+    """
+    if plant is None:
+        plant = MotorPlant()
+    kp, period_ms, setpoint = np.broadcast_arrays(
+        np.asarray(kp, dtype=float), np.asarray(period_ms, dtype=float),
+        np.asarray(setpoint, dtype=float))
+    n_cfg = kp.size
+    ticks = (duration_ms // period_ms).astype(int)
+    dt = period_ms*1e-3
+    # duty history for the dead time: the duty applied during the first part
+    # of a tick is the one commanded `lag` ticks earlier
+    lag = np.floor(plant.dead_time/dt).astype(int)
+    first = plant.dead_time/dt - lag
+    depth = int(lag.max()) + 2
+    history = np.zeros((n_cfg, depth))
+    rows = np.arange(n_cfg)
+
+    pos = np.zeros(n_cfg)
+    vel = np.zeros(n_cfg)
+    out = np.full((n_cfg, int(ticks.max())), np.nan)
+    for n in range(out.shape[1]):
+        active = n < ticks
+        error = setpoint - np.floor(pos)
+        duty = np.clip(kp*error, -100.0, 100.0)
+        history[:, n % depth] = duty
+        if plant.dead_time > 0:
+            old = history[rows, (n - lag - 1) % depth]
+            new = history[rows, (n - lag) % depth]
+            pos1, vel1 = _integrate(pos, vel, old, dt*first, plant)
+            pos1, vel1 = _integrate(pos1, vel1, new, dt*(1.0 - first), plant)
+        else:
+            pos1, vel1 = _integrate(pos, vel, duty, dt, plant)
+        pos = np.where(active, pos1, pos)
+        vel = np.where(active, vel1, vel)
+        out[:, n] = np.where(active, np.floor(pos), np.nan)
+    return out
+
+
+def step_metrics(traces, period_ms, setpoint, band=0.02):
+    """!
+    Computes overshoot, settling time and final error of sampled step
+    responses such as the ones simulate() returns, using step_metrics
+    @param traces Positions, shape (configs, ticks), NaN padded
+    @param period_ms Control period of each row in milliseconds
+    @param setpoint Setpoint of each row in encoder ticks
+    @param band Settling band as a fraction of the setpoint
+    @returns Tuple of overshoot in percent, settling time in milliseconds
+             (inf if never settled) and final error in ticks
+    """
+    period_ms = np.asarray(period_ms, dtype=float)
+    # sample n is taken at the end of tick n
+    times = (np.arange(traces.shape[1]) + 1)*period_ms[:, None]
+    result = _metrics.metrics(times, traces, setpoint, band=band)
+    return result['overshoot_pct'], result['settling_ms'], result['final_error']
+
+
+def _run_chunk(args):
+    kp, period_ms, setpoint, duration_ms, params, tick_us = args
+    plant = MotorPlant(**params)
+    traces = simulate(kp, period_ms, setpoint, duration_ms, plant)
+    overshoot, settling, final = step_metrics(traces, period_ms, setpoint)
+    load = tick_us/(period_ms*1000)*100
+    return np.column_stack((kp, period_ms, setpoint, overshoot, settling,
+                            final, load))
+
+
+def sweep(kps, periods_ms, setpoints, duration_ms=5000, plant=None,
+          tick_us=250, workers=None):
+    """!
+    Simulates every combination of gain, period and setpoint
+    @param kps Proportional gains to try
+    @param periods_ms Control periods to try, in milliseconds
+    @param setpoints Setpoints to try, in encoder ticks
+    @param duration_ms Length of every run in milliseconds
+    @param plant MotorPlant holding the model parameters, default if None
+    @param tick_us CPU time one control update takes, for the load column
+    @param workers Number of processes; grids of one chunk run in-process
+    @returns Array with one row per configuration and the columns in COLUMNS
+    """
+    if plant is None:
+        plant = MotorPlant()
+    params = dict(gain=plant.gain, tau=plant.tau, deadband=plant.deadband,
+                  dead_time=plant.dead_time, coast_tau=plant.coast_tau)
+    grid = np.array(list(itertools.product(kps, periods_ms, setpoints)),
+                    dtype=float).reshape(-1, 3)
+    # group by period so runs in a chunk end at similar tick counts
+    grid = grid[np.lexsort((grid[:, 2], grid[:, 0], grid[:, 1]))]
+    chunks = [(grid[i:i + CHUNK_SIZE, 0], grid[i:i + CHUNK_SIZE, 1],
+               grid[i:i + CHUNK_SIZE, 2], duration_ms, params, tick_us)
+              for i in range(0, len(grid), CHUNK_SIZE)]
+    if len(chunks) <= 1 or workers == 1:
+        parts = [_run_chunk(c) for c in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_run_chunk, chunks))
+    return np.vstack(parts) if parts else np.empty((0, len(COLUMNS)))
+
+
+def slowest_acceptable(results, max_overshoot=5.0, max_settling_ms=2000.0):
+    """!
+    Picks the configuration with the longest control period, and so the
+    lowest CPU load, that meets the overshoot and settling targets for every
+    setpoint tried with that gain and period
+    @param results Table returned by sweep()
+    @param max_overshoot Largest acceptable overshoot in percent
+    @param max_settling_ms Longest acceptable settling time in milliseconds
+    @returns Tuple (kp, period_ms) or None if nothing meets the targets
+    """
+    ok = (results[:, 3] <= max_overshoot) & (results[:, 4] <= max_settling_ms)
+    best = None
+    for kp, period in np.unique(results[:, :2], axis=0):
+        rows = (results[:, 0] == kp) & (results[:, 1] == period)
+        if ok[rows].all():
+            settle = results[rows, 4].max()
+            if (best is None or period > best[1]
+                    or period == best[1] and settle < best[2]):
+                best = (kp, period, settle)
+    return None if best is None else (float(best[0]), float(best[1]))
+
+
+def format_table(results):
+    """!
+    Formats a result table as aligned text lines
+    """
+    lines = ['{:>8} {:>10} {:>10} {:>14} {:>12} {:>12} {:>13}'.format(*COLUMNS)]
+    for row in results:
+        lines.append('{:8.4g} {:10.4g} {:10.0f} {:14.2f} {:12.0f} {:12.0f} {:13.2f}'
+                     .format(*row))
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--kp', type=float, nargs='+', default=[0.02, 0.05, 0.1])
+    parser.add_argument('--period', type=float, nargs='+', default=[10, 20, 30, 40, 50])
+    parser.add_argument('--setpoint', type=float, nargs='+', default=[100000, -150000])
+    parser.add_argument('--duration', type=float, default=5000, help='run length in ms')
+    parser.add_argument('--tick-us', type=float, default=250, help='CPU time per control update')
+    parser.add_argument('--max-overshoot', type=float, default=5.0, help='percent')
+    parser.add_argument('--max-settling', type=float, default=2000.0, help='ms')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--csv', help='also write the table to this file')
+    parser.add_argument('--plant', help='JSON file of MotorPlant parameters, from plant_fit.py')
+    args = parser.parse_args()
+
+    plant = None
+    if args.plant:
+        from plant_fit import load_params
+        plant = MotorPlant(**load_params(args.plant))
+    results = sweep(args.kp, args.period, args.setpoint, args.duration, plant,
+                    tick_us=args.tick_us, workers=args.workers)
+    print(format_table(results))
+    if args.csv:
+        np.savetxt(args.csv, results, delimiter=',', header=','.join(COLUMNS),
+                   comments='')
+    choice = slowest_acceptable(results, args.max_overshoot, args.max_settling)
+    if choice is None:
+        print('No configuration meets the targets')
+    else:
+        print(f'Slowest acceptable: Kp = {choice[0]:g}, period = {choice[1]:g} ms')
@@ -0,0 +1,204 @@
+"""! @file plant_fit.py
+Fits the DC motor model of motor_plant.py to logged runs. A log is the
+(time, setpoint, position, duty) records a SampleLogger holds, as sent in
+binary telemetry frames; step responses and runs with pseudo-random duty
+sequences both work, as long as the duty changes. The model is
+
+    tau*dv/dt + v = gain*(duty - deadband), delayed by dead_time
+
+and is fitted by linear least squares on the speed between samples, over a
+grid of deadband and dead time values that are all solved together. The
+result is checked by simulating each run with MotorPlant and saved as the
+JSON file of MotorPlant parameters that replay.py and period_sweep.py load.
+
+    python src/sim/plant_fit.py run1.npy run2.csv --save plant.json
+
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import argparse
+import json
+import math
+import numpy as np
+from motor_plant import MotorPlant
+
+## Columns of a log, in SampleLogger order
+TIME, SETPOINT, POSITION, DUTY = range(4)
+
+
+def load_log(path):
+    """!
+    Reads a log saved as .npy or as CSV lines of time, setpoint, position, duty
+    @returns Array with one row per sample
+    """
+    if path.endswith('.npy'):
+        return np.load(path)
+    return np.loadtxt(path, delimiter=',', ndmin=2)
+
+
+def prbs(n, low=-60, high=60, hold=5, seed=0):
+    """!
+    Makes a pseudo-random binary duty sequence for identification runs
+    @param n Number of samples
+    @param low Duty of the low level in percent
+    @param high Duty of the high level in percent
+    @param hold Shortest time a level is held, in samples
+    @param seed Random seed, so the sequence can be repeated
+    @returns Array of duty cycles
+    """
+    rng = np.random.default_rng(seed)
+    levels = np.where(rng.random(-(-n//hold)) < 0.5, low, high)
+    return np.repeat(levels, hold)[:n].astype(float)
+
+
+def _duty(log):
+    # logs written before SampleLogger saturated the duty hold the requested
+    # duty, which can be thousands of percent; the driver applies at most 100
+    return np.clip(log[:, DUTY], -100, 100)
+
+
+def _deadzone(duty, deadbands):
+    # effective drive of each duty for every candidate deadband, (C, N)
+    mag = np.abs(duty)[None, :] - deadbands[:, None]
+    return np.where(mag > 0, np.sign(duty)[None, :]*mag, 0.0)
+
+
+def _delay(drive, delay):
+    # delays every row by a possibly fractional number of samples; over each
+    # interval the drive is the old value for part of it and the new one after
+    m = int(delay)
+    phi = delay - m
+    out = np.zeros_like(drive)
+    out[:, m:] = drive[:, :drive.shape[1] - m]
+    if phi:
+        prev = np.zeros_like(drive)
+        prev[:, m + 1:] = drive[:, :drive.shape[1] - m - 1]
+        out = (1 - phi)*out + phi*prev
+    return out
+
+
+def _rows(log, deadbands, delay):
+    # regression rows of one run: the mean speed over the next interval from
+    # the mean speed over this one and the drive during both
+    t = log[:, TIME]/1000
+    dt = float(np.median(np.diff(t)))
+    duty = _duty(log)
+    speed = np.diff(log[:, POSITION])/dt
+    drive = _delay(_deadzone(duty, deadbands), delay)[:, 1:]
+    # the driver is disabled at zero duty and the motor coasts instead
+    use = (duty[1:-1] != 0) & (duty[2:] != 0)
+    x = np.stack((np.broadcast_to(speed[:-1], drive[:, 1:].shape),
+                  drive[:, 1:], drive[:, :-1]), axis=2)[:, use]
+    return x, speed[1:][use], dt
+
+
+def fit(logs, deadbands=None, delays=None):
+    """!
+    Fits the model to one or more runs made at the same control period
+    @param logs Sequence of logs, each an array of (time, setpoint, position,
+           duty) rows
+    @param deadbands Candidate deadbands in percent, 0 to 10 by 0.25 if None
+    @param delays Candidate dead times in samples, 0 to 3 by 0.25 if None
+    @returns Tuple of the parameter dict, as MotorPlant.set_params() takes,
+             and the R squared of the speed fit
+    """
+    if deadbands is None:
+        deadbands = np.arange(0, 10.01, 0.25)
+    if delays is None:
+        delays = np.arange(0, 3.01, 0.25)
+    deadbands = np.asarray(deadbands, dtype=float)
+    best = None
+    for delay in delays:
+        parts = [_rows(np.asarray(log, dtype=float), deadbands, delay) for log in logs]
+        dts = [dt for x, y, dt in parts]
+        if max(dts) > 1.1*min(dts):
+            raise ValueError('Runs have different control periods; fit each period separately')
+        x = np.concatenate([x for x, y, dt in parts], axis=1)
+        y = np.concatenate([y for x, y, dt in parts])
+        # normal equations of every candidate deadband, solved as one batch
+        xtx = np.einsum('cni,cnj->cij', x, x) + 1e-9*np.eye(3)
+        xty = np.einsum('cni,n->ci', x, y)
+        theta = np.linalg.solve(xtx, xty[:, :, None])[:, :, 0]
+        sse = ((np.einsum('cni,ci->cn', x, theta) - y)**2).sum(axis=1)
+        sse[(theta[:, 0] <= 0) | (theta[:, 0] >= 1)] = np.inf
+        c = int(np.argmin(sse))
+        if best is None or sse[c] < best[0]:
+            best = (sse[c], theta[c], deadbands[c], delay, np.mean(dts), y)
+    sse, (a, b0, b1), deadband, delay, dt, y = best
+    if not np.isfinite(sse):
+        raise ValueError('No stable first order model fits these runs')
+    params = dict(gain=float((b0 + b1)/(1 - a)), tau=float(-dt/math.log(a)),
+                  deadband=float(deadband), dead_time=float(delay*dt))
+    r2 = 1 - sse/max(((y - y.mean())**2).sum(), 1e-12)
+    return params, float(r2)
+
+
+def simulate(log, params):
+    """!
+    Runs the duty sequence of a log through MotorPlant
+    @param log Array of (time, setpoint, position, duty) rows
+    @param params Parameter dict from fit()
+    @returns Simulated position at every sample time
+    """
+    plant = MotorPlant(**params)
+    t_ns = np.round(np.asarray(log[:, TIME], dtype=float)*1e6).astype(np.int64)
+    # start from the first sample, at the speed of the first interval
+    speed = (log[1, POSITION] - log[0, POSITION])/((t_ns[1] - t_ns[0])*1e-9)
+    plant.reset(pos=float(log[0, POSITION]), vel=float(speed))
+    duties = _duty(log)
+    out = np.empty(len(log))
+    out[0] = plant.pos
+    for k in range(1, len(log)):
+        # each duty is applied over the interval ending at its sample
+        duty = float(duties[k])
+        plant.source = lambda: duty if duty != 0 else None
+        plant.step(t_ns[k - 1], t_ns[k])
+        out[k] = plant.pos
+    return out
+
+
+def fit_quality(log, params):
+    """!
+    Compares a run with the model's simulation of it
+    @returns Fit in percent, 100 meaning the simulation matches every sample,
+             as 100*(1 - |error|/|position - mean position|)
+    """
+    measured = np.asarray(log[:, POSITION], dtype=float)
+    error = np.linalg.norm(measured - simulate(log, params))
+    spread = max(np.linalg.norm(measured - measured.mean()), 1e-12)
+    return 100*(1 - error/spread)
+
+
+def save_params(path, params):
+    """!
+    Writes fitted parameters as JSON, for MotorPlant(**params)
+    """
+    with open(path, 'w') as file:
+        json.dump(params, file, indent=1)
+
+
+def load_params(path):
+    """!
+    Reads parameters written by save_params()
+    @returns Dict of MotorPlant.set_params() arguments
+    """
+    with open(path) as file:
+        return json.load(file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Fit the motor model to logged runs')
+    parser.add_argument('paths', nargs='+', help='logs as .npy or CSV files')
+    parser.add_argument('--save', help='write the parameters to this JSON file')
+    args = parser.parse_args()
+
+    logs = [load_log(path) for path in args.paths]
+    params, r2 = fit(logs)
+    print('  '.join(f'{name} = {value:.4g}' for name, value in params.items()))
+    print(f'speed fit R^2 = {r2:.4f}')
+    for path, log in zip(args.paths, logs):
+        print(f'{path}: simulation fit {fit_quality(log, params):.1f} %')
+    if args.save:
+        save_params(args.save, params)
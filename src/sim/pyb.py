@@ -0,0 +1,453 @@
+"""! @file pyb.py
+Stand-in for the MicroPython pyb module so the drivers in src run on a PC.
+Put the sim folder ahead of src on the Python path and import the board
+code unchanged. Pins, timers and PWM/encoder channels talk to the motors on
+motor_plant.bench, and time only passes when board code sleeps, which also
+adds MicroPython's sleep_ms/ticks_us family to the standard time module.
+Board modules in src imported after this module get the simulated heap of
+gc.py in this folder when they import gc. Every other module, including a
+board file run as the main program, keeps CPython's gc.
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import importlib.machinery as _importlib_machinery
+import importlib.util as _importlib_util
+import os as _os
+import sys as _sys
+import time as _time
+from motor_plant import bench, TIMER_SOURCE_FREQ
+
+## MicroPython ticks wrap at this value, like on the STM32 port
+TICKS_PERIOD = 1 << 30
+_TICKS_MAX = TICKS_PERIOD - 1
+_TICKS_HALF = TICKS_PERIOD // 2
+
+
+class _Board:
+    """!
+    Gives board pin names as attributes, like pyb.Pin.board.PA10
+    """
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return Pin(name)
+
+
+class Pin:
+    """!
+    This class simulates a GPIO pin. Constructing a pin with a name that was
+    already used returns the same object, as on the board.
+    """
+    IN = 0
+    OUT_PP = 1
+    OUT_OD = 17
+    AF_PP = 2
+    AF_OD = 18
+    ANALOG = 3
+    PULL_NONE = 0
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_RISING = 0x10110000
+    IRQ_FALLING = 0x10210000
+    board = _Board()
+
+    def __new__(cls, id, mode=None, pull=PULL_NONE, af=-1, value=None):
+        name = id.name() if isinstance(id, Pin) else str(id)
+        pin = bench.pins.get(name)
+        if pin is None:
+            pin = object.__new__(cls)
+            pin._name = name
+            pin._mode = cls.IN
+            pin._value = 0
+            bench.pins[name] = pin
+        return pin
+
+    def __init__(self, id, mode=None, pull=PULL_NONE, af=-1, value=None):
+        self.init(mode, pull, af, value)
+
+    def init(self, mode=None, pull=PULL_NONE, af=-1, value=None):
+        """!
+        Reconfigures the pin
+        @param mode Pin mode such as Pin.OUT_PP
+        @param pull Pull resistor setting
+        @param af Alternate function number
+        @param value Initial output level
+        """
+        if mode is not None:
+            self._mode = mode
+        self._pull = pull
+        if value is not None:
+            self._value = 1 if value else 0
+
+    def name(self):
+        return self._name
+
+    def mode(self):
+        return self._mode
+
+    def high(self):
+        self._value = 1
+
+    def low(self):
+        self._value = 0
+
+    on = high
+    off = low
+
+    def value(self, v=None):
+        """!
+        Reads the pin level, or sets it when a value is given
+        @param v New level, or None to read
+        """
+        if v is None:
+            return self._value
+        self._value = 1 if v else 0
+
+    __call__ = value
+
+    def __repr__(self):
+        return 'Pin(Pin.cpu.' + self._name + ')'
+
+
+class TimerChannel:
+    """!
+    This class simulates one channel of a timer in PWM or encoder mode
+    """
+
+    def __init__(self, timer, channel, mode):
+        self._timer = timer
+        self._channel = channel
+        self._mode = mode
+        self._compare = 0
+
+    def pulse_width(self, width=None):
+        """!
+        Reads or sets the compare value in timer counts
+        @param width New compare value, or None to read
+        """
+        if width is None:
+            return self._compare
+        top = self._timer._period + 1
+        self._compare = min(max(int(width), 0), top)
+
+    def pulse_width_percent(self, percent=None):
+        """!
+        Reads or sets the duty cycle as a percentage of the timer period.
+        Values outside 0-100 are clamped as the board does.
+        @param percent New duty cycle, or None to read
+        """
+        top = self._timer._period + 1
+        if percent is None:
+            return 100*self._compare/top
+        percent = min(max(percent, 0), 100)
+        self._compare = int(percent*top/100)
+
+    compare = pulse_width
+
+    def capture(self):
+        return self._compare
+
+    def callback(self, fun):
+        pass
+
+
+class Timer:
+    """!
+    This class simulates a hardware timer. Timers given a callback or a
+    frequency call back at their period as simulated time passes; timers whose
+    number is wired to a motor count its encoder.
+    """
+    UP = 0
+    DOWN = 16
+    CENTER = 32
+    PWM = 0
+    PWM_INVERTED = 1
+    OC_TIMING = 2
+    OC_ACTIVE = 3
+    OC_INACTIVE = 4
+    OC_TOGGLE = 5
+    OC_FORCED_ACTIVE = 6
+    OC_FORCED_INACTIVE = 7
+    IC = 8
+    ENC_A = 9
+    ENC_B = 10
+    ENC_AB = 11
+    HIGH = 0
+    LOW = 2
+    RISING = 0
+    FALLING = 2
+    BOTH = 10
+
+    def __new__(cls, id, *args, **kwargs):
+        tim = bench.timers.get(id)
+        if tim is None:
+            tim = object.__new__(cls)
+            tim._id = id
+            tim._channels = {}
+            tim._callback = None
+            tim._offset = 0
+            tim.next_ns = None
+            tim._prescaler = 0
+            tim._period = 0xFFFF
+            tim._start_ns = bench.now_ns
+            bench.timers[id] = tim
+        return tim
+
+    def __init__(self, id, freq=None, prescaler=None, period=None,
+                 callback=None, **kwargs):
+        # Timer(n) alone returns the timer as it is, as on the board
+        if freq is not None or period is not None or prescaler is not None:
+            self.init(freq=freq, prescaler=prescaler, period=period,
+                      callback=callback)
+        elif callback is not None:
+            self.callback(callback)
+
+    def init(self, freq=None, prescaler=None, period=None, callback=None,
+             **kwargs):
+        """!
+        Sets the timer rate either from a frequency or from a prescaler and
+        period pair, as pyb.Timer.init does
+        """
+        if freq is not None:
+            ticks = TIMER_SOURCE_FREQ // freq
+            self._prescaler = (ticks - 1) // 0x10000
+            self._period = ticks // (self._prescaler + 1) - 1
+        else:
+            self._prescaler = prescaler or 0
+            self._period = 0xFFFF if period is None else period
+        self._start_ns = bench.now_ns
+        self.callback(callback)
+
+    def deinit(self):
+        self._callback = None
+        self.next_ns = None
+        self._channels = {}
+
+    def period_ns(self):
+        """!
+        Returns how long one timer period lasts in simulated nanoseconds
+        """
+        return (self._prescaler + 1)*(self._period + 1)*1000000000 // TIMER_SOURCE_FREQ
+
+    def freq(self):
+        return TIMER_SOURCE_FREQ // ((self._prescaler + 1)*(self._period + 1))
+
+    def period(self, value=None):
+        if value is None:
+            return self._period
+        self._period = value
+
+    def prescaler(self, value=None):
+        if value is None:
+            return self._prescaler
+        self._prescaler = value
+
+    def source_freq(self):
+        return TIMER_SOURCE_FREQ
+
+    def channel(self, channel, mode=None, pin=None, pulse_width=None,
+                pulse_width_percent=None, **kwargs):
+        """!
+        Configures or returns a timer channel
+        @param channel Channel number
+        @param mode Channel mode such as Timer.PWM or Timer.ENC_AB
+        @param pin Pin the channel drives or reads
+        """
+        if mode is None:
+            return self._channels.get(channel)
+        ch = TimerChannel(self, channel, mode)
+        if pulse_width is not None:
+            ch.pulse_width(pulse_width)
+        if pulse_width_percent is not None:
+            ch.pulse_width_percent(pulse_width_percent)
+        self._channels[channel] = ch
+        return ch
+
+    def percent(self, channel):
+        """!
+        Returns the duty cycle of a PWM channel in percent, zero if unused.
+        Used by the motor model, not part of pyb.
+        """
+        ch = self._channels.get(channel)
+        if ch is None or ch._mode != Timer.PWM:
+            return 0
+        return 100*ch._compare/(self._period + 1)
+
+    def counter(self, value=None):
+        """!
+        Reads or sets the counter. A timer wired to a motor encoder counts
+        encoder ticks modulo the period; any other timer counts time.
+        @param value New counter value, or None to read
+        """
+        plant = bench.encoders.get(self._id)
+        if plant is not None:
+            raw = plant.counts()
+        else:
+            raw = (bench.now_ns - self._start_ns)*TIMER_SOURCE_FREQ // 1000000000 // (self._prescaler + 1)
+        if value is None:
+            return (raw - self._offset) % (self._period + 1)
+        self._offset = raw - value
+
+    def callback(self, fun):
+        """!
+        Sets the function called every timer period, or removes it with None
+        """
+        self._callback = fun
+        if fun is None:
+            self.next_ns = None
+        else:
+            self.next_ns = bench.now_ns + self.period_ns()
+
+    def fire(self):
+        """!
+        Runs the callback once and schedules the next one. Called by the bench.
+        """
+        self.next_ns += self.period_ns()
+        if self._callback is not None:
+            self._callback(self)
+
+
+class USB_VCP:
+    """!
+    This class simulates the USB serial port as two byte buffers
+    """
+
+    def __init__(self, id=0):
+        self.rx = bytearray()
+        self.tx = bytearray()
+
+    def any(self):
+        return len(self.rx) > 0
+
+    def read(self, nbytes=None):
+        if not self.rx:
+            return None
+        n = len(self.rx) if nbytes is None else nbytes
+        data = bytes(self.rx[:n])
+        del self.rx[:n]
+        return data
+
+    def write(self, buf):
+        self.tx.extend(buf)
+        return len(buf)
+
+    def isconnected(self):
+        return True
+
+
+def delay(ms):
+    bench.advance_ns(ms*1000000)
+
+
+def udelay(us):
+    bench.advance_ns(us*1000)
+
+
+def millis():
+    return (bench.now_ns // 1000000) & _TICKS_MAX
+
+
+def micros():
+    return (bench.now_ns // 1000) & _TICKS_MAX
+
+
+def elapsed_millis(start):
+    return (millis() - start) & _TICKS_MAX
+
+
+def elapsed_micros(start):
+    return (micros() - start) & _TICKS_MAX
+
+
+def disable_irq():
+    return True
+
+
+def enable_irq(state=True):
+    pass
+
+
+def freq():
+    return (TIMER_SOURCE_FREQ,)*4
+
+
+def _ticks_diff(end, start):
+    return ((end - start + _TICKS_HALF) & _TICKS_MAX) - _TICKS_HALF
+
+
+def _ticks_add(ticks, delta):
+    return (ticks + delta) & _TICKS_MAX
+
+
+# MicroPython's time module extensions, driven by the simulated clock
+_time.sleep_ms = delay
+_time.sleep_us = udelay
+_time.ticks_ms = millis
+_time.ticks_us = micros
+_time.ticks_cpu = micros
+_time.ticks_diff = _ticks_diff
+_time.ticks_add = _ticks_add
+
+
+## Folder of the board code; modules loaded from it get the simulated gc
+_BOARD_DIR = _os.path.dirname(_os.path.dirname(_os.path.abspath(__file__)))
+
+
+def _load_heap_model():
+    # CPython's gc is built in and found before gc.py on the path, so load
+    # the stand-in by file name
+    path = _os.path.join(_os.path.dirname(_os.path.abspath(__file__)), 'gc.py')
+    spec = _importlib_util.spec_from_file_location('gc', path)
+    module = _importlib_util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+## The simulated heap, bound as gc in board modules
+_heap = _load_heap_model()
+
+
+class _BoardLoader:
+    """!
+    Runs a board module with the simulated gc registered as gc, so its
+    import gc binds the stand-in, and puts CPython's gc back afterwards
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        real = _sys.modules.get('gc')
+        _sys.modules['gc'] = _heap
+        try:
+            self.loader.exec_module(module)
+        finally:
+            _sys.modules['gc'] = real
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+class _BoardFinder:
+    """!
+    Finds modules the usual way and gives those in the board folder a
+    _BoardLoader
+    """
+
+    @staticmethod
+    def find_spec(name, path=None, target=None):
+        spec = _importlib_machinery.PathFinder.find_spec(name, path, target)
+        if (spec is None or spec.origin is None
+                or _os.path.dirname(_os.path.abspath(spec.origin)) != _BOARD_DIR):
+            return None
+        spec.loader = _BoardLoader(spec.loader)
+        return spec
+
+
+_sys.meta_path.insert(0, _BoardFinder)
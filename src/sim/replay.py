@@ -0,0 +1,188 @@
+"""! @file replay.py
+Replays encoder recordings made on the board (see encoder_recorder.py and
+the record command of command_server.py) through the unchanged Encoder and
+Servo classes on the PC. Two ways are offered:
+    replay()              feeds the recorded counter values to Encoder.read
+                          through a stand-in timer, showing what a controller
+                          would have commanded from the same measurements
+    replay_closed_loop()  runs the controller against a MotorPlant with
+                          fitted parameters, calling it at the recorded read
+                          times, so the motor answers the new controller
+Both are deterministic and run far faster than real time. The command line
+measures every recording in a folder, for regression checks:
+
+    python src/sim/replay.py recordings --kp 0.05 --closed-loop --plant plant.json
+
+@author Nathaniel Davis
+@author Sebastian Bessoudo
+@date 10-18-2026
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import numpy as np
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [_HERE, os.path.join(_HERE, os.pardir),
+                os.path.join(_HERE, os.pardir, 'Used for Motor Testing')]
+
+import pyb
+import motor_plant
+from motor_driver_updated import MotorDriver
+from encoder_reader_updated import Encoder
+from servo_updated import Servo
+
+
+class ReplayTimer:
+    """!
+    Timer stand-in whose counter returns recorded values, one per read
+    """
+
+    def __init__(self, counters):
+        self.counters = counters
+        self.n = 0
+
+    def counter(self, value=None):
+        if value is not None:
+            return
+        n = min(self.n, len(self.counters) - 1)
+        self.n += 1
+        return int(self.counters[n])
+
+
+def save(path, recording):
+    """!
+    Saves a recording, such as the array BoardClient.record() returns
+    """
+    np.save(path, np.asarray(recording, dtype=np.int64))
+
+
+def load(path):
+    """!
+    Loads a recording saved with save()
+    @returns Array of (counter, ticks_us) rows
+    """
+    return np.load(path)
+
+
+def times_ms(recording):
+    """!
+    Converts the ticks_us column to ms since the first record, undoing the
+    wrap of the board's ticks counter
+    """
+    ticks = np.asarray(recording)[:, 1].astype(np.int64)
+    half = pyb.TICKS_PERIOD//2
+    steps = (np.diff(ticks) + half) % pyb.TICKS_PERIOD - half
+    return np.concatenate(([0], np.cumsum(steps)))/1000
+
+
+def _servo(kp, controller):
+    # a fresh bench for every replay keeps replays independent of each other
+    motor_plant.bench.reset()
+    moe = MotorDriver(pyb.Pin.board.PA10, pyb.Pin.board.PB4, 1, pyb.Pin.board.PB5, 2, 3)
+    enc = Encoder(pyb.Pin.board.PC6, pyb.Pin.board.PC7, 8, 1, 2)
+    serv = Servo(moe, enc)
+    serv.set_Kp(kp)
+    if controller is not None:
+        serv.set_controller(controller)
+    return serv
+
+
+def replay(recording, kp=0.05, setpoint=100000, controller=None):
+    """!
+    Runs Servo.set_setpoint once for every recorded encoder read, with the
+    encoder reading the recorded counter values
+    @param recording Array of (counter, ticks_us) rows; the first row holds
+           the counter the position counts from
+    @param kp Proportional gain
+    @param setpoint Setpoint in encoder ticks
+    @param controller PIDController to use instead of the proportional loop
+    @returns Arrays of time in ms, position in ticks and duty in percent,
+             one entry per read
+    """
+    serv = _servo(kp, controller)
+    enc = serv.encoder
+    enc.reader = ReplayTimer(recording[1:, 0])
+    enc.oldcounter = int(recording[0, 0])
+    enc.pos = 0
+    n = len(recording) - 1
+    position = np.empty(n)
+    duty = np.empty(n)
+    for i in range(n):
+        serv.set_setpoint(setpoint)
+        position[i] = enc.pos
+        duty[i] = serv.PWM
+    return times_ms(recording)[1:], position, duty
+
+
+def replay_closed_loop(recording, plant=None, kp=0.05, setpoint=100000,
+                       controller=None):
+    """!
+    Runs Servo.set_setpoint against a motor model at the times the board
+    read its encoder, so the timing jitter of the real loop is kept
+    @param recording Array of (counter, ticks_us) rows
+    @param plant MotorPlant, or dict of MotorPlant.set_params() arguments;
+           the default model if None
+    @param kp Proportional gain
+    @param setpoint Setpoint in encoder ticks
+    @param controller PIDController to use instead of the proportional loop
+    @returns Arrays of time in ms, position in ticks and duty in percent,
+             one entry per read
+    """
+    if not isinstance(plant, motor_plant.MotorPlant):
+        plant = motor_plant.MotorPlant(**(plant or {}))
+    bench = motor_plant.bench
+    bench.unwire()
+    bench.wire(plant, 'PA10', 3, 1, 2, 8)
+    try:
+        serv = _servo(kp, controller)
+        times = times_ms(recording)
+        position = np.empty(len(times) - 1)
+        duty = np.empty(len(times) - 1)
+        for i in range(1, len(times)):
+            bench.advance_ns(int(round((times[i] - times[i - 1])*1e6)))
+            serv.set_setpoint(setpoint)
+            position[i - 1] = serv.encoder.pos
+            duty[i - 1] = serv.PWM
+    finally:
+        motor_plant.wire_default()
+    return times[1:], position, duty
+
+
+if __name__ == "__main__":
+    import step_metrics
+
+    parser = argparse.ArgumentParser(description='Replay encoder recordings')
+    parser.add_argument('paths', nargs='+', help='recording .npy files or folders of them')
+    parser.add_argument('--kp', type=float, default=0.05)
+    parser.add_argument('--setpoint', type=int, default=100000)
+    parser.add_argument('--closed-loop', action='store_true',
+                        help='run against the motor model instead of the recorded counts')
+    parser.add_argument('--plant', help='JSON file of MotorPlant parameters')
+    parser.add_argument('--max-overshoot', type=float,
+                        help='fail if any replay overshoots more than this, in percent')
+    args = parser.parse_args()
+
+    files = []
+    for path in args.paths:
+        files += sorted(glob.glob(os.path.join(path, '*.npy'))) if os.path.isdir(path) else [path]
+    params = None
+    if args.plant:
+        with open(args.plant) as file:
+            params = json.load(file)
+
+    traces = []
+    for path in files:
+        if args.closed_loop:
+            t, pos, duty = replay_closed_loop(load(path), params, args.kp, args.setpoint)
+        else:
+            t, pos, duty = replay(load(path), args.kp, args.setpoint)
+        traces.append((t, pos))
+
+    results = step_metrics.trace_metrics(traces, args.setpoint)
+    print(step_metrics.format_table([os.path.basename(f) for f in files], results))
+    if args.max_overshoot is not None and np.any(results['overshoot_pct'] > args.max_overshoot):
+        sys.exit(1)